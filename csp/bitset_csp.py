@@ -0,0 +1,191 @@
+import heapq
+from collections import deque
+from typing import Generic, Dict, List, Optional, Tuple, Set, Deque, Iterator
+from csp import CSP, NotEqualConstraint, AllowedPairsConstraint, V, D
+
+
+Arc = Tuple[int, List[int], List[int]]  # (neighbour, support table, the neighbour's table back)
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def bits(mask: int) -> Iterator[int]:
+    while mask:
+        low: int = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitsetCSP(Generic[V, D]):
+    # A CSP made only of binary not-equal and allowed-pairs constraints,
+    # compiled to ints. Variables and values become indices, a domain is a
+    # bitmask over one shared list of values, and every arc x -> y carries a
+    # support table where support[i] is the mask of y values compatible with
+    # x taking value i. Checking or pruning a neighbour is then one AND.
+
+    def __init__(self, csp: CSP[V, D]) -> None:
+        self.variables: List[V] = list(csp.variables)
+        self.values: List[D] = []
+        self.value_index: Dict[D, int] = {}
+        value_index: Dict[D, int] = self.value_index
+        for variable in self.variables:
+            for value in csp.domains[variable]:
+                if value not in value_index:
+                    value_index[value] = len(self.values)
+                    self.values.append(value)
+        self.index: Dict[V, int] = {v: i for i, v in enumerate(self.variables)}
+        self.domains: List[int] = [sum(1 << value_index[value] for value in set(csp.domains[v]))
+                                   for v in self.variables]
+
+        # one table serves every not-equal arc: value i rules out only bit i
+        full: int = (1 << len(self.values)) - 1
+        not_equal: List[int] = [full ^ (1 << i) for i in range(len(self.values))]
+        self.neighbors: List[List[Arc]] = [[] for _ in self.variables]
+        seen: Set[int] = set()
+        for variable in self.variables:
+            for constraint in csp.constraints[variable]:
+                if id(constraint) in seen:
+                    continue
+                seen.add(id(constraint))
+                if isinstance(constraint, NotEqualConstraint):
+                    self._add_arcs(constraint.first, constraint.second, not_equal, not_equal)
+                elif isinstance(constraint, AllowedPairsConstraint):
+                    forward: List[int] = [0] * len(self.values)
+                    backward: List[int] = [0] * len(self.values)
+                    for a, b in constraint.pairs:
+                        if a in value_index and b in value_index:
+                            forward[value_index[a]] |= 1 << value_index[b]
+                            backward[value_index[b]] |= 1 << value_index[a]
+                    self._add_arcs(constraint.first, constraint.second, forward, backward)
+                else:
+                    raise TypeError(f'{type(constraint).__name__} cannot be compiled to a bitset table')
+
+    def _add_arcs(self, first: V, second: V, forward: List[int], backward: List[int]) -> None:
+        x, y = self.index[first], self.index[second]
+        self.neighbors[x].append((y, forward, backward))
+        self.neighbors[y].append((x, backward, forward))
+
+    def consistent(self, assignment: Dict[V, D]) -> bool:
+        # values outside a variable's domain count as violations too
+        chosen: Dict[int, int] = {}
+        for variable, value in assignment.items():
+            x: int = self.index[variable]
+            i: int = self.value_index.get(value, -1)
+            if i < 0 or not self.domains[x] >> i & 1:
+                return False
+            chosen[x] = i
+        for x, i in chosen.items():
+            for y, support, _ in self.neighbors[x]:
+                if y in chosen and not support[i] >> chosen[y] & 1:
+                    return False
+        return True
+
+    def ac3(self) -> bool:
+        # prune self.domains to arc consistency; False if some domain empties
+        domains: List[int] = self.domains
+        neighbors: List[List[Arc]] = self.neighbors
+        queue: Deque[Tuple[int, int, List[int]]] = deque(
+            (x, y, support) for x in range(len(domains)) for y, support, _ in neighbors[x])
+        while queue:
+            x, y, support = queue.popleft()
+            domain: int = domains[x]
+            other: int = domains[y]
+            revised: int = 0
+            for i in bits(domain):
+                if support[i] & other:
+                    revised |= 1 << i
+            if revised == domain:
+                continue
+            if not revised:
+                return False
+            domains[x] = revised
+            queue.extend((z, x, back) for z, _, back in neighbors[x] if z != y)
+        return True
+
+    def solve(self) -> Optional[Dict[V, D]]:
+        # Iterative backtracking with forward checking. The next variable is
+        # the one with the fewest values left (ties: more neighbours first),
+        # kept in a lazy heap that gets a fresh entry whenever a domain changes;
+        # entries whose size no longer matches are skipped when popped.
+        neighbors: List[List[Arc]] = self.neighbors
+        domains: List[int] = list(self.domains)
+        chosen: List[int] = [-1] * len(domains)
+        degree: List[int] = [len(arcs) for arcs in neighbors]
+        heap: List[Tuple[int, int, int]] = [(popcount(d), -degree[x], x) for x, d in enumerate(domains)]
+        heapq.heapify(heap)
+        trail: List[Tuple[int, int]] = []  # (variable, domain before pruning)
+        stack: List[List[int]] = []  # [variable, values not tried yet, trail mark]
+
+        while True:
+            variable: int = -1
+            while heap:
+                size, _, x = heapq.heappop(heap)
+                if chosen[x] < 0 and popcount(domains[x]) == size:
+                    variable = x
+                    break
+            if variable < 0:
+                return {self.variables[x]: self.values[i] for x, i in enumerate(chosen)}
+            stack.append([variable, domains[variable], len(trail)])
+
+            while stack:
+                frame: List[int] = stack[-1]
+                x, untried, mark = frame
+                while len(trail) > mark:
+                    y, domain = trail.pop()
+                    domains[y] = domain
+                    heapq.heappush(heap, (popcount(domain), -degree[y], y))
+                chosen[x] = -1
+                if not untried:
+                    stack.pop()
+                    heapq.heappush(heap, (popcount(domains[x]), -degree[x], x))
+                    continue
+
+                low: int = untried & -untried
+                frame[1] = untried ^ low
+                i: int = low.bit_length() - 1
+                chosen[x] = i
+                wiped: bool = False
+                for y, support, _ in neighbors[x]:
+                    if chosen[y] >= 0:
+                        continue
+                    domain = domains[y]
+                    pruned: int = domain & support[i]
+                    if pruned != domain:
+                        if not pruned:
+                            wiped = True
+                            break
+                        trail.append((y, domain))
+                        domains[y] = pruned
+                        heapq.heappush(heap, (popcount(pruned), -degree[y], y))
+                if not wiped:
+                    break
+            else:
+                return None
+
+
+if __name__ == "__main__":
+    from time import perf_counter
+    from map_coloring import MapColoringConstraint
+
+    # a triangulated grid: every interior region touches six others, four colours suffice
+    size: int = 320
+    regions: List[Tuple[int, int]] = [(r, c) for r in range(size) for c in range(size)]
+    grid: CSP[Tuple[int, int], str] = CSP(regions, {region: ["red", "green", "blue", "yellow"]
+                                                   for region in regions})
+    for r, c in regions:
+        for dr, dc in ((0, 1), (1, 0), (1, 1)):
+            if r + dr < size and c + dc < size:
+                grid.add_constraint(MapColoringConstraint((r, c), (r + dr, c + dc)))
+
+    started: float = perf_counter()
+    compiled: BitsetCSP[Tuple[int, int], str] = BitsetCSP(grid)
+    compiled_at: float = perf_counter()
+    solution: Optional[Dict[Tuple[int, int], str]] = compiled.solve()
+    finished: float = perf_counter()
+    if solution is None:
+        print("No solution found!")
+    else:
+        print(f"{len(solution)} regions coloured: compiled in {compiled_at - started:.2f}s, "
+              f"solved in {finished - compiled_at:.2f}s, valid: {compiled.consistent(solution)}")
@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional, Iterator
+from csp import CSP
+from global_constraints import AllDifferentConstraint, LinearEqualityConstraint
+
+
+class Cryptarithmetic:
+    # A puzzle like "SEND+MORE=MONEY" as a CSP over letters and column
+    # carries. Every column is its own linear equality,
+    #     letters in the column + carry in == result letter + 10 * carry out,
+    # so bounds propagation works on single digits instead of on one huge
+    # sum, and an alldifferent over the letters ties the columns together.
+
+    def __init__(self, puzzle: str) -> None:
+        self.puzzle: str = puzzle
+        left, _, right = puzzle.replace(' ', '').replace('==', '=').upper().partition('=')
+        self.addends: List[str] = [word for word in left.split('+') if word]
+        self.result: str = right
+        if not self.addends or not self.result.isalpha() or not all(word.isalpha() for word in self.addends):
+            raise ValueError(f'Cannot read puzzle {puzzle!r}, expected something like "SEND+MORE=MONEY"')
+        self.letters: List[str] = list(dict.fromkeys(''.join(self.addends) + self.result))
+        if len(self.letters) > 10:
+            raise ValueError('A puzzle can use at most ten different letters')
+
+        width: int = max(len(word) for word in self.addends + [self.result])
+        # a column adds at most 9 per addend plus a carry below len(addends)
+        carries: List[str] = [f'carry{column}' for column in range(1, width)]
+        leading: set = {word[0] for word in self.addends + [self.result] if len(word) > 1}
+        domains: Dict[str, List[int]] = {letter: list(range(1 if letter in leading else 0, 10))
+                                         for letter in self.letters}
+        domains.update({carry: list(range(len(self.addends))) for carry in carries})
+        self.csp: CSP[str, int] = CSP(self.letters + carries, domains)
+
+        self.csp.add_constraint(AllDifferentConstraint(self.letters))
+        for column in range(width):
+            terms: Dict[str, int] = {}
+            for word in self.addends:
+                if column < len(word):
+                    letter: str = word[-1 - column]
+                    terms[letter] = terms.get(letter, 0) + 1
+            if column < len(self.result):
+                letter = self.result[-1 - column]
+                terms[letter] = terms.get(letter, 0) - 1
+            if column > 0:
+                terms[carries[column - 1]] = 1
+            if column < width - 1:
+                terms[carries[column]] = -10
+            self.csp.add_constraint(LinearEqualityConstraint(terms, 0))
+
+    def _letters_only(self, solution: Dict[str, int]) -> Dict[str, int]:
+        return {letter: solution[letter] for letter in self.letters}
+
+    def solve(self) -> Optional[Dict[str, int]]:
+        solution: Optional[Dict[str, int]] = self.csp.backtracking_search(
+            propagation=CSP.Propagation.MAC, variable_ordering=CSP.VariableOrdering.MRV)
+        return None if solution is None else self._letters_only(solution)
+
+    def solutions(self) -> Iterator[Dict[str, int]]:
+        for solution in self.csp.iter_solutions(
+                propagation=CSP.Propagation.MAC, variable_ordering=CSP.VariableOrdering.MRV):
+            yield self._letters_only(solution)
+
+    def check(self, solution: Dict[str, int]) -> bool:
+        def number(word: str) -> int:
+            return int(''.join(str(solution[letter]) for letter in word))
+
+        return (len(set(solution.values())) == len(solution)
+                and sum(number(word) for word in self.addends) == number(self.result))
+
+
+if __name__ == "__main__":
+    from time import perf_counter
+
+    puzzles: List[str] = [
+        "SEND+MORE=MONEY",
+        "SO+MANY+MORE+MEN+SEEM+TO+SAY+THAT+THEY+MAY+SOON+TRY+TO+STAY+AT+HOME+SO+AS+TO+SEE+OR+HEAR"
+        "+THE+SAME+ONE+MAN+TRY+TO+MEET+THE+TEAM+ON+THE+MOON+AS+HE+HAS+AT+THE+OTHER+TEN=TESTS",
+    ]
+    for text in puzzles:
+        started: float = perf_counter()
+        puzzle: Cryptarithmetic = Cryptarithmetic(text)
+        solution: Optional[Dict[str, int]] = puzzle.solve()
+        elapsed: float = perf_counter() - started
+        if solution is None:
+            print(f"{text[:30]}: no solution found!")
+        else:
+            print(f"{text[:30]}: {solution} in {elapsed * 1000:.1f}ms, valid: {puzzle.check(solution)}")
@@ -1,10 +1,18 @@
-from typing import Generic,  TypeVar, Dict, List, Optional
+from typing import Generic, TypeVar, Dict, List, Optional, Tuple, Deque, Iterator, Iterable, Set, Callable, Generator
+import heapq
 from abc import ABC, abstractmethod
+from collections import deque
+from enum import Enum
 
 
 V = TypeVar('V')
 D = TypeVar('D')
 
+CHECK_EVERY: int = 1024
+
+# the variable heap is rebuilt once it holds this many entries per unassigned variable
+HEAP_SLACK: int = 4
+
 
 class Constraint(Generic[V, D], ABC):
 
@@ -16,12 +24,106 @@ class Constraint(Generic[V, D], ABC):
         pass
 
 
+class NotEqualConstraint(Constraint[V, D]):
+
+    def __init__(self, first: V, second: V) -> None:
+        super().__init__([first, second])
+        self.first: V = first
+        self.second: V = second
+
+    def satisfied(self, assignment: Dict[V, D]) -> bool:
+        if self.first not in assignment or self.second not in assignment:
+            return True
+
+        return assignment[self.first] != assignment[self.second]
+
+
+class AllowedPairsConstraint(Constraint[V, D]):
+    # (first value, second value) combinations given as an explicit table
+
+    def __init__(self, first: V, second: V, pairs: Iterable[Tuple[D, D]]) -> None:
+        super().__init__([first, second])
+        self.first: V = first
+        self.second: V = second
+        self.pairs: Set[Tuple[D, D]] = set(pairs)
+
+    def satisfied(self, assignment: Dict[V, D]) -> bool:
+        if self.first not in assignment or self.second not in assignment:
+            return True
+
+        return (assignment[self.first], assignment[self.second]) in self.pairs
+
+
+class GlobalConstraint(Constraint[V, D]):
+    # A constraint that prunes the domains of all its variables at once. With
+    # forward checking or MAC the solver calls propagate() instead of testing
+    # satisfied() value by value, and repeats it until no domain changes.
+
+    @abstractmethod
+    def propagate(self, store: 'DomainStore[V, D]') -> bool:
+        # prune store through store.prune; assigned variables have one value
+        # left. Return False once some domain is empty or the constraint fails.
+        pass
+
+
+class DomainStore(Generic[V, D]):
+    # Current domains during a search. Values are never copied or deleted,
+    # only flagged dead, and every flag flip goes on a trail so backtracking
+    # restores domains by unwinding the trail to a saved mark.
+
+    def __init__(self, domains: Dict[V, List[D]]) -> None:
+        self.values: Dict[V, List[D]] = domains
+        self.alive: Dict[V, List[bool]] = {v: [True] * len(values) for v, values in domains.items()}
+        self.sizes: Dict[V, int] = {v: len(values) for v, values in domains.items()}
+        self.trail: List[Tuple[V, int]] = []
+
+    def current(self, variable: V) -> List[D]:
+        alive: List[bool] = self.alive[variable]
+        return [value for i, value in enumerate(self.values[variable]) if alive[i]]
+
+    def indices(self, variable: V) -> List[int]:
+        alive: List[bool] = self.alive[variable]
+        return [i for i in range(len(alive)) if alive[i]]
+
+    def prune(self, variable: V, index: int) -> None:
+        self.alive[variable][index] = False
+        self.sizes[variable] -= 1
+        self.trail.append((variable, index))
+
+    def mark(self) -> int:
+        return len(self.trail)
+
+    def restore(self, mark: int) -> None:
+        trail: List[Tuple[V, int]] = self.trail
+        while len(trail) > mark:
+            variable, index = trail.pop()
+            self.alive[variable][index] = True
+            self.sizes[variable] += 1
+
+
+class SearchFrame(Generic[V, D]):
+    # one open variable on the solver's explicit stack
+    __slots__ = ('variable', 'index', 'values', 'position', 'mark')
+
+    def __init__(self, variable: V, index: int, values: List[D], mark: int) -> None:
+        self.variable: V = variable
+        self.index: int = index  # where it sat in the unassigned list
+        self.values: List[D] = values
+        self.position: int = 0  # next value to try
+        self.mark: int = mark  # domain trail length before any value was tried
+
+
 class CSP(Generic[V, D]):
+    # qualname lets the members pickle, e.g. for process pool workers
+    Propagation = Enum('Propagation', 'NONE FORWARD_CHECKING MAC', qualname='CSP.Propagation')
+    VariableOrdering = Enum('VariableOrdering', 'STATIC MRV DEGREE DOM_WDEG', qualname='CSP.VariableOrdering')
+    ValueOrdering = Enum('ValueOrdering', 'DOMAIN LCV', qualname='CSP.ValueOrdering')
 
     def __init__(self, variables: List[V], domains: Dict[V, List[D]]):
         self.variables: List[V] = variables
         self.domains: Dict[V, List[D]] = domains
         self.constraints: Dict[V, List[Constraint[V, D]]] = {}
+        self._arcs: Optional[Dict[V, List[Tuple[V, Constraint[V, D]]]]] = None
 
         for variable in self.variables:
             self.constraints[variable] = []
@@ -30,10 +132,11 @@ class CSP(Generic[V, D]):
 
     def add_constraint(self, constraint: Constraint[V, D]):
         for variable in constraint.variables:
-            if variable not in self.variables:
+            if variable not in self.constraints:
                 raise LookupError('Variable in constraint not in CSP')
 
             self.constraints[variable].append(constraint)
+        self._arcs = None
 
     def consistent(self, variable: V, assignment: Dict[V, D]) -> bool:
         for constraint in self.constraints[variable]:
@@ -41,20 +144,589 @@ class CSP(Generic[V, D]):
                 return False
         return True
 
-    def backtracking_search(self, assignment: Dict[V, D] = None) -> Optional[Dict[V, D]]:
-        assignment = assignment if assignment is not None else {}
+    def binary_arcs(self) -> Dict[V, List[Tuple[V, Constraint[V, D]]]]:
+        # every constraint over exactly two variables, seen from both ends
+        if self._arcs is None:
+            self._arcs = {v: [] for v in self.variables}
+            for variable in self.variables:
+                for constraint in self.constraints[variable]:
+                    if len(constraint.variables) == 2:
+                        other: V = constraint.variables[1] if constraint.variables[0] == variable \
+                            else constraint.variables[0]
+                        self._arcs[variable].append((other, constraint))
+        return self._arcs
+
+    def backtracking_search(
+            self,
+            assignment: Dict[V, D] = None,
+            propagation: 'CSP.Propagation' = Propagation.NONE,
+            variable_ordering: 'CSP.VariableOrdering' = VariableOrdering.STATIC,
+            value_ordering: 'CSP.ValueOrdering' = ValueOrdering.DOMAIN,
+    ) -> Optional[Dict[V, D]]:
+        solver: BacktrackingSolver[V, D] = BacktrackingSolver(self, propagation, variable_ordering, value_ordering)
+        return solver.solve(assignment)
+
+    def iter_solutions(
+            self,
+            assignment: Dict[V, D] = None,
+            propagation: 'CSP.Propagation' = Propagation.NONE,
+            variable_ordering: 'CSP.VariableOrdering' = VariableOrdering.STATIC,
+            value_ordering: 'CSP.ValueOrdering' = ValueOrdering.DOMAIN,
+    ) -> Iterator[Dict[V, D]]:
+        # solutions one at a time; only the one being yielded is held in memory
+        solver: BacktrackingSolver[V, D] = BacktrackingSolver(self, propagation, variable_ordering, value_ordering)
+        for solution in solver._solutions(assignment):
+            yield solution.copy()
+
+    def count_solutions(self) -> int:
+        return SolutionCounter(self).count()
+
+
+class BacktrackingSolver(Generic[V, D]):
+    # Iterative backtracking with pluggable propagation, variable ordering and
+    # value ordering. The unassigned variables live in one list that is updated
+    # by swapping the chosen variable to the end, so picking and restoring a
+    # variable never rescans csp.variables.
+    #
+    # The dynamic orderings pick from a lazy heap, as BitsetCSP does: a
+    # variable gets a fresh entry whenever its domain size, degree or weighted
+    # degree changes, and popped entries that no longer match are dropped.
+    # Degrees are counts kept up to date as neighbours are taken and put back.
+
+    def __init__(
+            self,
+            csp: CSP[V, D],
+            propagation: 'CSP.Propagation' = CSP.Propagation.NONE,
+            variable_ordering: 'CSP.VariableOrdering' = CSP.VariableOrdering.STATIC,
+            value_ordering: 'CSP.ValueOrdering' = CSP.ValueOrdering.DOMAIN,
+    ) -> None:
+        self.csp: CSP[V, D] = csp
+        self.propagation: CSP.Propagation = propagation
+        self.variable_ordering: CSP.VariableOrdering = variable_ordering
+        self.value_ordering: CSP.ValueOrdering = value_ordering
+        self.store: DomainStore[V, D] = DomainStore(csp.domains)
+        # dom/wdeg: constraint weights grow each time a constraint causes a failure
+        self.weights: Dict[Constraint[V, D], int] = {}
+        self.unassigned: List[V] = []
+        self.position: Dict[V, int] = {}  # index of each unassigned variable in that list
+        self.order: Dict[V, int] = {v: i for i, v in enumerate(csp.variables)}
+        self.heap: List[Tuple[float, float, int, V]] = []
+        self.free: Dict[Constraint[V, D], int] = {}  # unassigned variables per constraint
+        self.degree: Dict[V, int] = {}
+        self.weighted_degree: Dict[V, int] = {}
+        self.globals: Dict[V, List[GlobalConstraint[V, D]]] = {
+            v: [c for c in csp.constraints[v] if isinstance(c, GlobalConstraint)] for v in csp.variables}
+        self.nodes: int = 0
+        # polled every CHECK_EVERY nodes; returning True abandons the search
+        self.interrupt: Optional[Callable[[], bool]] = None
+
+    def solve(self, assignment: Optional[Dict[V, D]] = None) -> Optional[Dict[V, D]]:
+        return next(self._solutions(assignment), None)
+
+    def _solutions(self, assignment: Optional[Dict[V, D]] = None) -> Iterator[Dict[V, D]]:
+        # One assignment dict is mutated in place and each open variable keeps
+        # a frame on an explicit stack, so depth is bounded by memory rather
+        # than the recursion limit. The yielded dict is live: copy it to keep it.
+        assignment = dict(assignment) if assignment is not None else {}
+        store: DomainStore[V, D] = self.store
+        # reversed, so the static order simply takes the last element
+        self.unassigned = [v for v in reversed(self.csp.variables) if v not in assignment]
+        self.position = {v: i for i, v in enumerate(self.unassigned)}
+        self.heap = []
+        if self.variable_ordering != CSP.VariableOrdering.STATIC:
+            self._count_degrees()
+        for variable, value in list(assignment.items()):
+            if not self._consistent(variable, assignment) or not self._assign(variable, value, assignment):
+                return
+        if self.propagation != CSP.Propagation.NONE:
+            everything: Dict[GlobalConstraint[V, D], None] = {}
+            for constraints in self.globals.values():
+                everything.update(dict.fromkeys(constraints))
+            if not self._propagate_globals(list(everything)):
+                return
+        for variable in self.unassigned:
+            self._push(variable)
+        if not self.unassigned:
+            yield assignment
+            return
+
+        stack: List[SearchFrame[V, D]] = [self._open(assignment)]
+        while stack:
+            frame: SearchFrame[V, D] = stack[-1]
+            variable: V = frame.variable
+            if variable in assignment:
+                del assignment[variable]
+                self._restore(frame.mark)
+            if frame.position == len(frame.values):
+                stack.pop()
+                self._put_back(variable, frame.index)
+                continue
+
+            self.nodes += 1
+            if self.interrupt is not None and self.nodes % CHECK_EVERY == 0 and self.interrupt():
+                return
+            value: D = frame.values[frame.position]
+            frame.position += 1
+            assignment[variable] = value
+            if self._consistent(variable, assignment) and self._assign(variable, value, assignment):
+                for changed, _ in store.trail[frame.mark:]:
+                    self._push(changed)
+                if self.unassigned:
+                    stack.append(self._open(assignment))
+                else:
+                    yield assignment
+
+    def _open(self, assignment: Dict[V, D]) -> 'SearchFrame[V, D]':
+        index: int = self._select_index(assignment)
+        variable: V = self._take(index)
+        return SearchFrame(variable, index, self._ordered_values(variable, assignment), self.store.mark())
+
+    def _take(self, index: int) -> V:
+        unassigned: List[V] = self.unassigned
+        variable: V = unassigned[index]
+        unassigned[index] = unassigned[-1]
+        self.position[unassigned[index]] = index
+        unassigned.pop()
+        del self.position[variable]
+        if self.variable_ordering != CSP.VariableOrdering.STATIC:
+            self._reconnect(variable, -1)
+        return variable
+
+    def _put_back(self, variable: V, index: int) -> None:
+        unassigned: List[V] = self.unassigned
+        unassigned.append(variable)
+        unassigned[index], unassigned[-1] = unassigned[-1], unassigned[index]
+        self.position[unassigned[-1]] = len(unassigned) - 1
+        self.position[unassigned[index]] = index
+        if self.variable_ordering != CSP.VariableOrdering.STATIC:
+            self._reconnect(variable, 1)
+            self._push(variable)
+
+    def _restore(self, mark: int) -> None:
+        store: DomainStore[V, D] = self.store
+        if self.variable_ordering == CSP.VariableOrdering.STATIC:
+            store.restore(mark)
+            return
+        changed: Set[V] = {variable for variable, _ in store.trail[mark:]}
+        store.restore(mark)
+        for variable in changed:
+            self._push(variable)
+
+    def _count_degrees(self) -> None:
+        # degree: unassigned variables sharing a constraint, counted per constraint;
+        # weighted degree: weights of the constraints with another unassigned variable
+        position: Dict[V, int] = self.position
+        self.free = {}
+        for variable in self.csp.variables:
+            for constraint in self.csp.constraints[variable]:
+                if constraint not in self.free:
+                    self.free[constraint] = sum(1 for v in constraint.variables if v in position)
+        self.degree = {v: 0 for v in self.csp.variables}
+        self.weighted_degree = {v: 0 for v in self.csp.variables}
+        for variable in self.csp.variables:
+            for constraint in self.csp.constraints[variable]:
+                others: int = self.free[constraint] - (variable in position)
+                self.degree[variable] += others
+                if others > 0:
+                    self.weighted_degree[variable] += self.weights.get(constraint, 1)
+
+    def _reconnect(self, variable: V, delta: int) -> None:
+        # variable was just taken (delta -1) or put back (+1), so everything
+        # sharing a constraint with it loses or gains one unassigned neighbour
+        position: Dict[V, int] = self.position
+        for constraint in self.csp.constraints[variable]:
+            if delta < 0:
+                self.free[constraint] -= 1
+            free: int = self.free[constraint]
+            weight: int = self.weights.get(constraint, 1)
+            for other in constraint.variables:
+                if other == variable:
+                    continue
+                self.degree[other] += delta
+                if free - (other in position) == 0:  # its last other unassigned variable
+                    self.weighted_degree[other] += delta * weight
+                self._push(other)
+            if delta > 0:
+                self.free[constraint] += 1
+
+    def _key(self, variable: V) -> Tuple[float, float]:
+        size: int = self.store.sizes[variable]
+        ordering: CSP.VariableOrdering = self.variable_ordering
+        if ordering == CSP.VariableOrdering.MRV:
+            # fewest values left, ties broken by the largest degree
+            return size, -self.degree[variable]
+        if ordering == CSP.VariableOrdering.DEGREE:
+            return -self.degree[variable], size
+        return size / max(1, self.weighted_degree[variable]), 0
+
+    def _push(self, variable: V) -> None:
+        if variable in self.position and self.variable_ordering != CSP.VariableOrdering.STATIC:
+            first, second = self._key(variable)
+            heapq.heappush(self.heap, (first, second, self.order[variable], variable))
+            if len(self.heap) > HEAP_SLACK * len(self.unassigned) + 64:
+                self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        # Stale entries are normally dropped when popped, but dom/wdeg keys
+        # only shrink as weights grow, so old entries sink below every fresh
+        # one and would pile up for the whole search. Every key that changes
+        # later is pushed again, so a rebuild from scratch is always safe.
+        self.heap = [(*self._key(v), self.order[v], v) for v in self.unassigned]
+        heapq.heapify(self.heap)
+
+    def _select_index(self, assignment: Dict[V, D]) -> int:
+        if self.variable_ordering == CSP.VariableOrdering.STATIC:
+            return len(self.unassigned) - 1
+        # ties go to the variable listed first in csp.variables
+        while True:
+            first, second, _, variable = heapq.heappop(self.heap)
+            if variable in self.position and self._key(variable) == (first, second):
+                return self.position[variable]
+
+    def _ordered_values(self, variable: V, assignment: Dict[V, D]) -> List[D]:
+        values: List[D] = self.store.current(variable)
+        if self.value_ordering == CSP.ValueOrdering.DOMAIN or len(values) < 2:
+            return values
+        # least constraining value: rule out as few neighbour values as possible
+        return sorted(values, key=lambda value: self._ruled_out(variable, value, assignment))
+
+    def _ruled_out(self, variable: V, value: D, assignment: Dict[V, D]) -> int:
+        # values are tried in place and taken back, as in _forward_check
+        store: DomainStore[V, D] = self.store
+        assignment[variable] = value
+        count: int = 0
+        for constraint in self.csp.constraints[variable]:
+            for other in constraint.variables:
+                if other in assignment:
+                    continue
+                other_values: List[D] = store.values[other]
+                for i in store.indices(other):
+                    assignment[other] = other_values[i]
+                    if not constraint.satisfied(assignment):
+                        count += 1
+                assignment.pop(other, None)
+        del assignment[variable]
+        return count
+
+    def _fail(self, constraint: Constraint[V, D]) -> None:
+        self.weights[constraint] = self.weights.get(constraint, 1) + 1
+        if self.variable_ordering == CSP.VariableOrdering.DOM_WDEG:
+            for variable in constraint.variables:
+                if self.free[constraint] - (variable in self.position) > 0:
+                    self.weighted_degree[variable] += 1
+                    self._push(variable)
+
+    def _consistent(self, variable: V, assignment: Dict[V, D]) -> bool:
+        for constraint in self.csp.constraints[variable]:
+            if not constraint.satisfied(assignment):
+                self._fail(constraint)
+                return False
+        return True
+
+    def _assign(self, variable: V, value: D, assignment: Dict[V, D]) -> bool:
+        # shrink the variable's own domain to the chosen value, then propagate;
+        # False means some domain was wiped out and this branch is dead
+        if self.propagation == CSP.Propagation.NONE:
+            return True
+        store: DomainStore[V, D] = self.store
+        mark: int = store.mark()
+        values: List[D] = store.values[variable]
+        for i in store.indices(variable):
+            if values[i] != value:
+                store.prune(variable, i)
+        if not self._forward_check(variable, assignment):
+            return False
+        if self.propagation == CSP.Propagation.MAC:
+            if not self._ac3(assignment, [(neighbor, variable) for neighbor, _ in self.csp.binary_arcs()[variable]
+                                          if neighbor not in assignment]):
+                return False
+        # global constraints on every variable pruned so far, the assigned one first
+        touched: Dict[GlobalConstraint[V, D], None] = dict.fromkeys(self.globals[variable])
+        for changed, _ in store.trail[mark:]:
+            touched.update(dict.fromkeys(self.globals[changed]))
+        return self._propagate_globals(list(touched))
+
+    def _propagate_globals(self, constraints: List[GlobalConstraint[V, D]]) -> bool:
+        # run global propagators until none of them prunes anything more
+        store: DomainStore[V, D] = self.store
+        pending: Deque[GlobalConstraint[V, D]] = deque(constraints)
+        queued: Set[GlobalConstraint[V, D]] = set(constraints)
+        while pending:
+            constraint: GlobalConstraint[V, D] = pending.popleft()
+            queued.discard(constraint)
+            mark: int = store.mark()
+            if not constraint.propagate(store):
+                self._fail(constraint)
+                return False
+            for changed, _ in store.trail[mark:]:
+                for other in self.globals[changed]:
+                    if other is not constraint and other not in queued:
+                        queued.add(other)
+                        pending.append(other)
+        return True
+
+    def _forward_check(self, variable: V, assignment: Dict[V, D]) -> bool:
+        store: DomainStore[V, D] = self.store
+        for constraint in self.csp.constraints[variable]:
+            if isinstance(constraint, GlobalConstraint):
+                continue
+            for other in constraint.variables:
+                if other in assignment:
+                    continue
+                values: List[D] = store.values[other]
+                for i in store.indices(other):
+                    assignment[other] = values[i]
+                    if not constraint.satisfied(assignment):
+                        store.prune(other, i)
+                assignment.pop(other, None)
+                if store.sizes[other] == 0:
+                    self._fail(constraint)
+                    return False
+        return True
+
+    def _revise(self, x: V, y: V, constraint: Constraint[V, D]) -> bool:
+        store: DomainStore[V, D] = self.store
+        x_values: List[D] = store.values[x]
+        y_values: List[D] = store.values[y]
+        y_indices: List[int] = store.indices(y)
+        revised: bool = False
+        for i in store.indices(x):
+            pair: Dict[V, D] = {x: x_values[i]}
+            supported: bool = False
+            for j in y_indices:
+                pair[y] = y_values[j]
+                if constraint.satisfied(pair):
+                    supported = True
+                    break
+            if not supported:
+                store.prune(x, i)
+                revised = True
+        return revised
+
+    def _ac3(self, assignment: Dict[V, D], arcs: List[Tuple[V, V]]) -> bool:
+        queue: Deque[Tuple[V, V]] = deque(arcs)
+        arc_constraints: Dict[V, List[Tuple[V, Constraint[V, D]]]] = self.csp.binary_arcs()
+        while queue:
+            x, y = queue.popleft()
+            for other, constraint in arc_constraints[x]:
+                if other != y or not self._revise(x, y, constraint):
+                    continue
+                if self.store.sizes[x] == 0:
+                    self._fail(constraint)
+                    return False
+                queue.extend((z, x) for z, _ in arc_constraints[x] if z != y and z not in assignment)
+        return True
+
+
+class ComponentNode(Generic[V]):
+    # one component in SolutionCounter's split tree
+    __slots__ = ('variable', 'parts', 'boundary')
+
+    def __init__(self, variable: V, boundary: Tuple[V, ...]) -> None:
+        self.variable: V = variable  # branched on first
+        self.parts: List[int] = []  # the components left once it is assigned
+        self.boundary: Tuple[V, ...] = boundary  # assigned variables next to the component
+
+
+class SolutionCounter(Generic[V, D]):
+    # Counts solutions without enumerating them. Once some variables are
+    # assigned, the unassigned ones fall apart into connected components of
+    # the constraint graph that can be counted separately and multiplied.
+    # A component's count depends only on the values of the assigned
+    # variables around it, so it is memoised under that key.
+    #
+    # Which components appear depends only on which variables are assigned,
+    # never on their values, so the splits are worked out once, up front,
+    # into a tree of ComponentNodes; counting then walks that tree through
+    # generators driven by an explicit stack, so deep graphs do not hit the
+    # recursion limit.
+
+    def __init__(self, csp: CSP[V, D]) -> None:
+        self.csp: CSP[V, D] = csp
+        self.order: Dict[V, int] = {v: i for i, v in enumerate(csp.variables)}
+        self.neighbors: Dict[V, Set[V]] = {v: set() for v in csp.variables}
+        for variable in csp.variables:
+            for constraint in csp.constraints[variable]:
+                self.neighbors[variable].update(other for other in constraint.variables if other != variable)
+        self.tree: List[ComponentNode[V]] = []
+        # the component each variable is in while the tree is built, -1 once branched on
+        self.label: Dict[V, int] = {}
+        self.memo: Dict[Tuple[int, Tuple[D, ...]], int] = {}
+        self.assignment: Dict[V, D] = {}
+
+    def count(self) -> int:
+        total: int = 1
+        for root in self._build():
+            total *= self._run(root)
+            if total == 0:
+                break
+        return total
+
+    def _build(self) -> List[int]:
+        neighbors: Dict[V, Set[V]] = self.neighbors
+        label: Dict[V, int] = self.label
+        roots: List[int] = []
+        # (tree node, label, size, boundary variable -> its neighbours inside, members if no boundary)
+        pending: List[Tuple[int, int, int, Dict[V, int], List[V]]] = []
+        for seed in self.csp.variables:
+            if seed in label:
+                continue
+            # a component's label is the index of its tree node
+            members: List[V] = self._flood(seed, len(self.tree))
+            roots.append(self._node(pending, len(self.tree), len(members), {}, members))
+
+        while pending:
+            node, current, size, boundary, members = pending.pop()
+            if boundary:
+                # branch next to the assigned variables, so the boundary stays
+                # narrow and the memo keys repeat; then on the most connected variable
+                candidates: Set[V] = {n for b in boundary for n in neighbors[b] if label[n] == current}
+            else:
+                candidates = set(members)
+
+            def score(v: V) -> Tuple[int, int, int]:
+                inside: int = sum(1 for n in neighbors[v] if label[n] == current)
+                return len(neighbors[v]) - inside, len(neighbors[v]), -self.order[v]
+
+            variable: V = max(candidates, key=score)
+            self.tree[node].variable = variable
+            label[variable] = -1
+            size -= 1
+            for n in neighbors[variable]:
+                if n in boundary:
+                    boundary[n] -= 1
+                    if boundary[n] == 0:
+                        del boundary[n]
+            starts: List[V] = [n for n in neighbors[variable] if label[n] == current]
+            boundary[variable] = len(starts)
+            for part in self._split(starts, current):
+                size -= len(part)
+                part_label: int = len(self.tree)
+                part_boundary: Dict[V, int] = {}
+                for member in part:
+                    label[member] = part_label
+                for member in part:
+                    for n in neighbors[member]:
+                        if label[n] == -1:
+                            part_boundary[n] = part_boundary.get(n, 0) + 1
+                            boundary[n] -= 1
+                            if boundary[n] == 0:
+                                del boundary[n]
+                self.tree[node].parts.append(self._node(pending, part_label, len(part), part_boundary, []))
+            if size:
+                # the largest part keeps the label and the boundary counts
+                self.tree[node].parts.append(self._node(pending, current, size, boundary, []))
+        return roots
+
+    def _node(self, pending: List[Tuple[int, int, int, Dict[V, int], List[V]]], current: int, size: int,
+              boundary: Dict[V, int], members: List[V]) -> int:
+        # the branch variable is filled in when the node is taken off pending
+        node: int = len(self.tree)
+        self.tree.append(ComponentNode(None, tuple(sorted(boundary, key=self.order.__getitem__))))
+        pending.append((node, current, size, boundary, members))
+        return node
+
+    def _flood(self, seed: V, current: int) -> List[V]:
+        label: Dict[V, int] = self.label
+        label[seed] = current
+        members: List[V] = [seed]
+        frontier: List[V] = [seed]
+        while frontier:
+            for neighbor in self.neighbors[frontier.pop()]:
+                if neighbor not in label:
+                    label[neighbor] = current
+                    members.append(neighbor)
+                    frontier.append(neighbor)
+        return members
+
+    def _split(self, starts: List[V], current: int) -> List[List[V]]:
+        # Breadth-first searches from every start, one step each in turn,
+        # merging when they meet. Each search that runs dry is a whole part;
+        # once one search is left its part is what remains, so it is never
+        # walked and a split costs about as much as the smaller parts.
+        neighbors: Dict[V, Set[V]] = self.neighbors
+        label: Dict[V, int] = self.label
+        owner: Dict[V, int] = {}
+        group: List[int] = list(range(len(starts)))  # union-find over searches
+
+        def find(i: int) -> int:
+            while group[i] != i:
+                group[i] = group[group[i]]
+                i = group[i]
+            return i
+
+        frontiers: Dict[int, Deque[V]] = {}
+        members: Dict[int, List[V]] = {}
+        for i, start in enumerate(starts):
+            if start in owner:
+                group[i] = find(owner[start])
+                continue
+            owner[start] = i
+            frontiers[i] = deque([start])
+            members[i] = [start]
 
-        if len(assignment) == len(self.variables):
-            return assignment
+        parts: List[List[V]] = []
+        while len(frontiers) > 1:
+            for i in list(frontiers):
+                if i not in frontiers or len(frontiers) < 2:
+                    continue
+                if not frontiers[i]:
+                    parts.append(members.pop(i))
+                    del frontiers[i]
+                    continue
+                g: int = i
+                for neighbor in neighbors[frontiers[i].popleft()]:
+                    if label[neighbor] != current:
+                        continue
+                    if neighbor not in owner:
+                        owner[neighbor] = g
+                        frontiers[g].append(neighbor)
+                        members[g].append(neighbor)
+                        continue
+                    j: int = find(owner[neighbor])
+                    if j != g:
+                        # keep the bigger search, move the smaller one into it
+                        big, small = (g, j) if len(members[g]) >= len(members[j]) else (j, g)
+                        group[small] = big
+                        frontiers[big].extend(frontiers.pop(small))
+                        members[big].extend(members.pop(small))
+                        g = big
+        return parts
 
-        unassigned: List[V] = [v for v in self.variables if v not in assignment]
-        first: V = unassigned[0]
-        for value in self.domains[first]:
-            local_assignment = assignment.copy()
-            local_assignment[first] = value
+    def _run(self, node: int) -> int:
+        stack: List[Generator[int, int, int]] = [self._count(node)]
+        result: Optional[int] = None
+        while stack:
+            try:
+                request: int = stack[-1].send(result)
+            except StopIteration as finished:
+                stack.pop()
+                result = finished.value
+                continue
+            stack.append(self._count(request))
+            result = None
+        return result
 
-            if self.consistent(first, local_assignment):
-                result: Optional[Dict[V, D]] = self.backtracking_search(local_assignment)
+    def _count(self, node: int) -> Generator[int, int, int]:
+        # yields a part's tree node to have it counted, receiving its count back
+        assignment: Dict[V, D] = self.assignment
+        component: ComponentNode[V] = self.tree[node]
+        key: Tuple[int, Tuple[D, ...]] = (node, tuple(assignment[b] for b in component.boundary))
+        if key in self.memo:
+            return self.memo[key]
 
-                if result is not None:
-                    return result
+        variable: V = component.variable
+        total: int = 0
+        for value in self.csp.domains[variable]:
+            assignment[variable] = value
+            if not self.csp.consistent(variable, assignment):
+                continue
+            product: int = 1
+            for part in component.parts:
+                product *= yield part
+                if product == 0:
+                    break
+            total += product
+        assignment.pop(variable, None)
+        self.memo[key] = total
+        return total
@@ -0,0 +1,186 @@
+from typing import Dict, List, Optional, Set, Tuple, Iterator, Hashable
+from csp import GlobalConstraint, DomainStore, V, D
+
+
+Node = Tuple[int, Hashable]  # (0, variable) or (1, value) in the alldifferent value graph
+
+
+class AllDifferentConstraint(GlobalConstraint[V, D]):
+    # Every variable takes a different value. Propagation follows Regin: find
+    # a maximum matching of variables to values; if it does not cover every
+    # variable the constraint fails, otherwise a value stays in a domain only
+    # if some maximum matching uses it. That removes every value blocked by a
+    # Hall set, e.g. two variables sharing the same two values.
+
+    def __init__(self, variables: List[V]) -> None:
+        super().__init__(variables)
+
+    def satisfied(self, assignment: Dict[V, D]) -> bool:
+        seen: Set[D] = set()
+        for variable in self.variables:
+            if variable in assignment:
+                value: D = assignment[variable]
+                if value in seen:
+                    return False
+                seen.add(value)
+        return True
+
+    def propagate(self, store: DomainStore[V, D]) -> bool:
+        options: Dict[V, List[Hashable]] = {v: [store.values[v][i] for i in store.indices(v)]
+                                            for v in self.variables}
+        match_variable: Dict[V, Hashable] = {}
+        match_value: Dict[Hashable, V] = {}
+        for variable in self.variables:
+            if not _augment(variable, options, match_variable, match_value):
+                return False
+
+        # matched edges point variable -> value, the others value -> variable
+        edges: Dict[Node, List[Node]] = {}
+        for variable, values in options.items():
+            edges[(0, variable)] = [(1, match_variable[variable])]
+            for value in values:
+                if value != match_variable[variable]:
+                    edges.setdefault((1, value), []).append((0, variable))
+
+        # values on an even alternating path from a free value can be swapped in
+        free: List[Node] = [(1, value) for values in options.values() for value in values
+                            if value not in match_value]
+        reachable: Set[Node] = set(free)
+        frontier: List[Node] = list(reachable)
+        while frontier:
+            for target in edges.get(frontier.pop(), []):
+                if target not in reachable:
+                    reachable.add(target)
+                    frontier.append(target)
+
+        component: Dict[Node, int] = _strongly_connected(edges)
+        for variable in self.variables:
+            values: List[D] = store.values[variable]
+            for i in store.indices(variable):
+                value: D = values[i]
+                if value == match_variable[variable] or (1, value) in reachable:
+                    continue
+                if component.get((1, value)) != component[(0, variable)]:
+                    store.prune(variable, i)
+        return True
+
+
+def _augment(root: V, options: Dict[V, List[Hashable]], match_variable: Dict[V, Hashable],
+             match_value: Dict[Hashable, V]) -> bool:
+    # Kuhn's augmenting path search from root, with an explicit stack.
+    # path[k] is the value tried by stack[k]; on reaching a free value every
+    # variable on the stack moves to its path value.
+    visited: Set[Hashable] = set()
+    stack: List[Tuple[V, Iterator[Hashable]]] = [(root, iter(options[root]))]
+    path: List[Hashable] = []
+    while stack:
+        variable, candidates = stack[-1]
+        for value in candidates:
+            if value in visited:
+                continue
+            visited.add(value)
+            owner: Optional[V] = match_value.get(value)
+            path.append(value)
+            if owner is None:
+                for (on_path, _), taken in zip(stack, path):
+                    match_variable[on_path] = taken
+                    match_value[taken] = on_path
+                return True
+            stack.append((owner, iter(options[owner])))
+            break
+        else:
+            stack.pop()
+            if path:
+                path.pop()
+    return False
+
+
+def _strongly_connected(edges: Dict[Node, List[Node]]) -> Dict[Node, int]:
+    # Tarjan's algorithm without recursion
+    index: Dict[Node, int] = {}
+    low: Dict[Node, int] = {}
+    component: Dict[Node, int] = {}
+    stack: List[Node] = []
+    on_stack: Set[Node] = set()
+    counter: int = 0
+    for start in list(edges):
+        if start in index:
+            continue
+        work: List[Tuple[Node, Iterator[Node]]] = [(start, iter(edges.get(start, [])))]
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+        while work:
+            node, successors = work[-1]
+            advanced: bool = False
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(edges.get(successor, []))))
+                    advanced = True
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent: Node = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                while True:
+                    member: Node = stack.pop()
+                    on_stack.discard(member)
+                    component[member] = index[node]
+                    if member == node:
+                        break
+    return component
+
+
+class LinearEqualityConstraint(GlobalConstraint[V, int]):
+    # sum(coefficient * variable) == total, kept bounds consistent: each term
+    # must fit between total minus the most and the least the others can add
+
+    def __init__(self, terms: Dict[V, int], total: int) -> None:
+        super().__init__([variable for variable, coefficient in terms.items() if coefficient != 0])
+        self.terms: Dict[V, int] = {v: terms[v] for v in self.variables}
+        self.total: int = total
+
+    def satisfied(self, assignment: Dict[V, int]) -> bool:
+        if any(variable not in assignment for variable in self.variables):
+            return True
+        return sum(c * assignment[v] for v, c in self.terms.items()) == self.total
+
+    def propagate(self, store: DomainStore[V, int]) -> bool:
+        changed: bool = True
+        while changed:
+            changed = False
+            bounds: List[Tuple[int, int]] = []
+            for variable, coefficient in self.terms.items():
+                values: List[int] = store.values[variable]
+                products: List[int] = [coefficient * values[i] for i in store.indices(variable)]
+                if not products:
+                    return False
+                bounds.append((min(products), max(products)))
+            lowest: int = sum(low for low, _ in bounds)
+            highest: int = sum(high for _, high in bounds)
+            if lowest > self.total or highest < self.total:
+                return False
+
+            for (variable, coefficient), (low, high) in zip(self.terms.items(), bounds):
+                floor: int = self.total - (highest - high)
+                ceiling: int = self.total - (lowest - low)
+                if floor <= low and high <= ceiling:
+                    continue
+                values = store.values[variable]
+                for i in store.indices(variable):
+                    if not floor <= coefficient * values[i] <= ceiling:
+                        store.prune(variable, i)
+                        changed = True
+                if store.sizes[variable] == 0:
+                    return False
+        return True
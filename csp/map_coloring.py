@@ -1,20 +1,14 @@
-from csp import Constraint, CSP
+from csp import NotEqualConstraint, CSP
 from typing import Dict, List, Optional
 
 
-class MapColoringConstraint(Constraint[str, str]):
+class MapColoringConstraint(NotEqualConstraint[str, str]):
     def __init__(self, place1: str, place2: str) -> None:
-        super().__init__([place1, place2])
+        super().__init__(place1, place2)
 
         self.place1: str = place1
         self.place2: str = place2
 
-    def satisfied(self, assignment: Dict[str, str]) -> bool:
-        if self.place1 not in assignment or self.place2 not in assignment:
-            return True
-
-        return assignment[self.place1] != assignment[self.place2]
-
 
 if __name__ == '__main__':
     variables: List[str] = [
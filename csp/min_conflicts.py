@@ -0,0 +1,190 @@
+import random
+from time import perf_counter
+from typing import Generic, Dict, List, Optional, Set
+from csp import CSP, Constraint, V, D
+
+
+# how many steps run between looks at the clock
+CHECK_EVERY: int = 64
+
+
+class MinConflictsSolver(Generic[V, D]):
+    # Local search over complete assignments. Each step takes a random
+    # variable that sits in a violated constraint and gives it the value that
+    # violates the fewest of its constraints. Only the constraints on the
+    # changed variable are re-checked, and the violated set and the
+    # per-variable conflict counts are patched from those results.
+    #
+    # A variable may not take back a value it just left for tabu_tenure steps,
+    # unless that would beat the best assignment seen so far. After max_steps
+    # without a solution the search restarts from a fresh assignment.
+
+    def __init__(
+            self,
+            csp: CSP[V, D],
+            seed: Optional[int] = None,
+            tabu_tenure: int = 2,
+            max_steps: Optional[int] = None,
+            max_restarts: int = 10,
+            time_budget: Optional[float] = None,
+    ) -> None:
+        self.csp: CSP[V, D] = csp
+        self.random: random.Random = random.Random(seed)
+        # counted in steps over the whole problem; with small domains a long
+        # tenure leaves a revisited variable only bad values near the end
+        self.tabu_tenure: int = tabu_tenure
+        self.max_steps: int = max_steps if max_steps is not None else 50 * len(csp.variables) + 10000
+        self.max_restarts: int = max_restarts
+        self.time_budget: Optional[float] = time_budget
+        self.assignment: Dict[V, D] = {}
+        self.violated: Set[Constraint[V, D]] = set()
+        self.conflicts: Dict[V, int] = {}
+        # conflicted variables as a list with positions, for O(1) random picks and removals
+        self._conflicted: List[V] = []
+        self._position: Dict[V, int] = {}
+        self._tabu: Dict[V, Dict[D, int]] = {}
+        self.steps: int = 0
+        self.restarts: int = 0
+
+    def solve(self) -> Optional[Dict[V, D]]:
+        deadline: Optional[float] = perf_counter() + self.time_budget if self.time_budget is not None else None
+        self.steps = 0
+        for attempt in range(self.max_restarts + 1):
+            self.restarts = attempt
+            self._initial()
+            best: int = len(self.violated)
+            for step in range(self.max_steps):
+                if not self._conflicted:
+                    return dict(self.assignment)
+                if deadline is not None and step % CHECK_EVERY == 0 and perf_counter() > deadline:
+                    return None
+                self.steps += 1
+                self._step(step, best)
+                best = min(best, len(self.violated))
+            if not self._conflicted:
+                return dict(self.assignment)
+        return None
+
+    def _initial(self) -> None:
+        # greedy: each variable in turn takes a value that breaks the fewest
+        # constraints among the ones already fully assigned
+        csp: CSP[V, D] = self.csp
+        assignment: Dict[V, D] = {}
+        self.assignment = assignment
+        variables: List[V] = list(csp.variables)
+        self.random.shuffle(variables)
+        for variable in variables:
+            domain: List[D] = csp.domains[variable]
+            best: List[D] = []
+            fewest: Optional[int] = None
+            for value in domain:
+                assignment[variable] = value
+                broken: int = sum(1 for constraint in csp.constraints[variable]
+                                  if not constraint.satisfied(assignment))
+                if fewest is None or broken < fewest:
+                    best, fewest = [value], broken
+                elif broken == fewest:
+                    best.append(value)
+            assignment[variable] = self.random.choice(best)
+
+        self.violated = set()
+        self.conflicts = {v: 0 for v in csp.variables}
+        self._conflicted = []
+        self._position = {}
+        self._tabu = {v: {} for v in csp.variables}
+        for variable in csp.variables:
+            for constraint in csp.constraints[variable]:
+                if constraint not in self.violated and not constraint.satisfied(assignment):
+                    self._set_violated(constraint, True)
+
+    def _set_violated(self, constraint: Constraint[V, D], violated: bool) -> None:
+        if violated:
+            self.violated.add(constraint)
+        else:
+            self.violated.discard(constraint)
+        delta: int = 1 if violated else -1
+        for variable in set(constraint.variables):
+            count: int = self.conflicts[variable] + delta
+            self.conflicts[variable] = count
+            if count == 1 and delta == 1:
+                self._position[variable] = len(self._conflicted)
+                self._conflicted.append(variable)
+            elif count == 0:
+                index: int = self._position.pop(variable)
+                last: V = self._conflicted.pop()
+                if last != variable:
+                    self._conflicted[index] = last
+                    self._position[last] = index
+
+    def _step(self, step: int, best: int) -> None:
+        assignment: Dict[V, D] = self.assignment
+        variable: V = self._conflicted[self.random.randrange(len(self._conflicted))]
+        constraints: List[Constraint[V, D]] = self.csp.constraints[variable]
+        current: D = assignment[variable]
+        # violations outside this variable's constraints do not change with its value
+        elsewhere: int = len(self.violated) - sum(1 for c in constraints if c in self.violated)
+        tabu: Dict[D, int] = self._tabu[variable]
+
+        candidates: List[D] = []
+        fewest: Optional[int] = None
+        for value in self.csp.domains[variable]:
+            if value == current:
+                continue
+            assignment[variable] = value
+            broken: int = sum(1 for constraint in constraints if not constraint.satisfied(assignment))
+            if tabu.get(value, -1) > step and elsewhere + broken >= best:
+                continue  # tabu, and not good enough to override it
+            if fewest is None or broken < fewest:
+                candidates, fewest = [value], broken
+            elif broken == fewest:
+                candidates.append(value)
+        if not candidates:
+            assignment[variable] = current
+            return
+
+        chosen: D = self.random.choice(candidates)
+        assignment[variable] = chosen
+        tabu[current] = step + self.tabu_tenure
+        for constraint in constraints:
+            violated: bool = not constraint.satisfied(assignment)
+            if violated != (constraint in self.violated):
+                self._set_violated(constraint, violated)
+
+
+def min_conflicts(csp: CSP[V, D], seed: Optional[int] = None, time_budget: Optional[float] = None,
+                  max_steps: Optional[int] = None, max_restarts: int = 10) -> Optional[Dict[V, D]]:
+    return MinConflictsSolver(csp, seed, max_steps=max_steps, max_restarts=max_restarts,
+                              time_budget=time_budget).solve()
+
+
+if __name__ == "__main__":
+    from map_coloring import MapColoringConstraint
+
+    # a random planar map: regions on a grid, each joined to its right and
+    # lower neighbours and across one randomly chosen diagonal of every square
+    size: int = 200
+    rng: random.Random = random.Random(0)
+    regions: List[int] = list(range(size * size))
+    colours: CSP[int, str] = CSP(regions, {region: ["red", "green", "blue", "yellow"] for region in regions})
+    for r in range(size):
+        for c in range(size):
+            region: int = r * size + c
+            if c + 1 < size:
+                colours.add_constraint(MapColoringConstraint(region, region + 1))
+            if r + 1 < size:
+                colours.add_constraint(MapColoringConstraint(region, region + size))
+            if r + 1 < size and c + 1 < size:
+                if rng.random() < 0.5:
+                    colours.add_constraint(MapColoringConstraint(region, region + size + 1))
+                else:
+                    colours.add_constraint(MapColoringConstraint(region + 1, region + size))
+
+    solver: MinConflictsSolver[int, str] = MinConflictsSolver(colours, seed=1, time_budget=60.0)
+    started: float = perf_counter()
+    solution: Optional[Dict[int, str]] = solver.solve()
+    elapsed: float = perf_counter() - started
+    if solution is None:
+        print(f"No solution within the budget, {len(solver.violated)} constraints still broken")
+    else:
+        valid: bool = all(colours.consistent(region, solution) for region in regions)
+        print(f"{len(regions)} regions coloured in {elapsed:.2f}s after {solver.steps} steps, valid: {valid}")
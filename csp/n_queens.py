@@ -0,0 +1,185 @@
+import random
+from typing import Dict, List, Optional
+
+
+# Boards are returned in the shape queens.py prints: {column: row}, both from 1.
+
+
+def _place(n: int, full: int, columns: int, left: int, right: int, rows: List[int]) -> bool:
+    # columns/left/right are the rows attacked along a row and the two
+    # diagonals by the queens already placed; bits shift as we move right
+    if len(rows) == n:
+        return True
+    free: int = full & ~(columns | left | right)
+    while free:
+        bit: int = free & -free
+        free ^= bit
+        rows.append(bit.bit_length())
+        if _place(n, full, columns | bit, (left | bit) << 1 & full, (right | bit) >> 1, rows):
+            return True
+        rows.pop()
+    return False
+
+
+def _count(full: int, columns: int, left: int, right: int) -> int:
+    if columns == full:
+        return 1
+    total: int = 0
+    free: int = full & ~(columns | left | right)
+    while free:
+        bit: int = free & -free
+        free ^= bit
+        total += _count(full, columns | bit, (left | bit) << 1 & full, (right | bit) >> 1)
+    return total
+
+
+def solve_queens(n: int) -> Optional[Dict[int, int]]:
+    # exact backtracking over bitmasks, one column per level; fine up to n = 20 or so
+    rows: List[int] = []
+    if not _place(n, (1 << n) - 1, 0, 0, 0, rows):
+        return None
+    return {column: row for column, row in enumerate(rows, start=1)}
+
+
+def count_queens(n: int) -> int:
+    # Mirroring the board top to bottom maps solutions onto solutions, so
+    # only queens in the top half of the first column are tried and counted
+    # twice; the middle row of an odd board is counted once.
+    if n == 0:
+        return 1
+    full: int = (1 << n) - 1
+    total: int = 0
+    for row in range(n // 2):
+        bit: int = 1 << row
+        total += 2 * _count(full, bit, bit << 1 & full, bit >> 1)
+    if n % 2:
+        bit = 1 << n // 2
+        total += _count(full, bit, bit << 1 & full, bit >> 1)
+    return total
+
+
+class MinConflictsQueens:
+    # Local search for very large boards (Sosic and Gu). The queens form a
+    # permutation, one per column and one per row, so only diagonals can
+    # conflict. Counters per diagonal give the conflicts of a queen in O(1),
+    # and a move swaps the rows of a conflicted queen and a random one when
+    # that lowers the total.
+
+    def __init__(self, n: int, seed: Optional[int] = None, max_steps: Optional[int] = None) -> None:
+        self.n: int = n
+        self.random: random.Random = random.Random(seed)
+        self.max_steps: int = max_steps if max_steps is not None else 20 * n + 1000
+        self.rows: List[int] = []
+        self.down: List[int] = []  # queens on each diagonal row + column
+        self.up: List[int] = []  # queens on each diagonal row - column + n - 1
+        self.restarts: int = 0
+
+    def _conflicts(self, column: int) -> int:
+        row: int = self.rows[column]
+        return self.down[row + column] + self.up[row - column + self.n - 1] - 2
+
+    def _move(self, column: int, row: int, delta: int) -> None:
+        self.down[row + column] += delta
+        self.up[row - column + self.n - 1] += delta
+
+    def _initial(self) -> None:
+        # place queens column by column on free diagonals where a random
+        # untried row allows it; the rest go anywhere and are repaired later
+        n: int = self.n
+        rows: List[int] = list(range(n))
+        self.random.shuffle(rows)
+        self.rows = rows
+        self.down = [0] * (2 * n - 1)
+        self.up = [0] * (2 * n - 1)
+        down, up, randrange = self.down, self.up, self.random.randrange
+        tries: int = int(3.08 * n)
+        column: int = 0
+        while column < n and tries > 0:
+            other: int = randrange(column, n)
+            rows[column], rows[other] = rows[other], rows[column]
+            row: int = rows[column]
+            tries -= 1
+            if down[row + column] == 0 and up[row - column + n - 1] == 0:
+                down[row + column] += 1
+                up[row - column + n - 1] += 1
+                column += 1
+        for rest in range(column, n):
+            self._move(rest, rows[rest], 1)
+
+    def _repair(self) -> bool:
+        n: int = self.n
+        rows: List[int] = self.rows
+        conflicted: List[int] = [c for c in range(n) if self._conflicts(c) > 0]
+        steps: int = 0
+        while conflicted:
+            if steps >= self.max_steps:
+                return False
+            steps += 1
+            i: int = conflicted[-1]
+            if self._conflicts(i) == 0:
+                conflicted.pop()
+                continue
+            j: int = self.random.randrange(n)
+            if i == j:
+                continue
+            before: int = self._conflicts(i) + self._conflicts(j)
+            self._move(i, rows[i], -1)
+            self._move(j, rows[j], -1)
+            rows[i], rows[j] = rows[j], rows[i]
+            self._move(i, rows[i], 1)
+            self._move(j, rows[j], 1)
+            if self._conflicts(i) + self._conflicts(j) < before:
+                if self._conflicts(j) > 0:
+                    conflicted.append(j)
+            else:
+                self._move(i, rows[i], -1)
+                self._move(j, rows[j], -1)
+                rows[i], rows[j] = rows[j], rows[i]
+                self._move(i, rows[i], 1)
+                self._move(j, rows[j], 1)
+            if not conflicted:
+                # a swap can create conflicts for queens that left the list earlier
+                conflicted = [c for c in range(n) if self._conflicts(c) > 0]
+        return True
+
+    def solve(self, max_restarts: int = 50) -> Optional[Dict[int, int]]:
+        if self.n in (2, 3):
+            return None
+        for attempt in range(max_restarts + 1):
+            self.restarts = attempt
+            self._initial()
+            if self._repair():
+                return {column: row + 1 for column, row in enumerate(self.rows, start=1)}
+        return None
+
+
+def min_conflicts_queens(n: int, seed: Optional[int] = None) -> Optional[Dict[int, int]]:
+    return MinConflictsQueens(n, seed).solve()
+
+
+def is_solution(board: Dict[int, int]) -> bool:
+    n: int = len(board)
+    rows, down, up = set(), set(), set()
+    for column, row in board.items():
+        if not 1 <= row <= n or row in rows or row + column in down or row - column in up:
+            return False
+        rows.add(row)
+        down.add(row + column)
+        up.add(row - column)
+    return sorted(board) == list(range(1, n + 1))
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+
+    print(solve_queens(8))
+    print([count_queens(n) for n in range(1, 13)])
+
+    for n in (1000, 1000000):
+        started: float = perf_counter()
+        board: Optional[Dict[int, int]] = min_conflicts_queens(n, seed=1)
+        elapsed: float = perf_counter() - started
+        if board is None:
+            print(f"No solution found for n={n}")
+        else:
+            print(f"n={n}: solved in {elapsed:.2f}s, valid: {is_solution(board)}")
@@ -0,0 +1,131 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Set, Tuple
+from csp import CSP, BacktrackingSolver, V, D
+
+
+# subproblems per worker: many small tasks keep every worker busy to the end
+TASKS_PER_WORKER: int = 16
+
+Options = Tuple['CSP.Propagation', 'CSP.VariableOrdering', 'CSP.ValueOrdering']
+
+_csp = None
+_options = None
+_stop_event = None
+
+
+def _init_worker(csp: CSP, options: Options, stop_event) -> None:
+    # the CSP goes to each worker once, not once per task
+    global _csp, _options, _stop_event
+    _csp, _options, _stop_event = csp, options, stop_event
+
+
+def _solver() -> BacktrackingSolver:
+    solver: BacktrackingSolver = BacktrackingSolver(_csp, *_options)
+    if _stop_event is not None:
+        solver.interrupt = _stop_event.is_set
+    return solver
+
+
+def _solve_prefix(prefix: Dict[V, D]) -> Optional[Dict[V, D]]:
+    if _stop_event is not None and _stop_event.is_set():
+        return None
+    return _solver().solve(prefix)
+
+
+def _count_prefix(prefix: Dict[V, D]) -> int:
+    return sum(1 for _ in _solver()._solutions(prefix))
+
+
+def split(csp: CSP[V, D], tasks: int) -> List[Dict[V, D]]:
+    # Consistent assignments to the first variables, one more variable per
+    # layer until there are at least `tasks` of them. Every solution extends
+    # exactly one prefix, so the subproblems partition the search tree.
+    prefixes: List[Dict[V, D]] = [{}]
+    for variable in csp.variables:
+        if len(prefixes) >= tasks:
+            break
+        extended: List[Dict[V, D]] = []
+        for prefix in prefixes:
+            for value in csp.domains[variable]:
+                candidate: Dict[V, D] = prefix.copy()
+                candidate[variable] = value
+                if csp.consistent(variable, candidate):
+                    extended.append(candidate)
+        prefixes = extended
+    return prefixes
+
+
+def _executor(csp: CSP[V, D], options: Options, stop_event, max_workers: Optional[int]) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=max_workers or multiprocessing.cpu_count(),
+        initializer=_init_worker,
+        initargs=(csp, options, stop_event),
+    )
+
+
+def parallel_search(
+        csp: CSP[V, D],
+        propagation: 'CSP.Propagation' = CSP.Propagation.NONE,
+        variable_ordering: 'CSP.VariableOrdering' = CSP.VariableOrdering.STATIC,
+        value_ordering: 'CSP.ValueOrdering' = CSP.ValueOrdering.DOMAIN,
+        max_workers: Optional[int] = None,
+) -> Optional[Dict[V, D]]:
+    # Subproblems sit in the pool's shared queue and idle workers take the
+    # next one, so a worker that drew an easy prefix moves straight on. The
+    # first solution found wins and the stop flag ends the others early;
+    # it need not be the solution backtracking_search would return.
+    workers: int = max_workers or multiprocessing.cpu_count()
+    prefixes: List[Dict[V, D]] = split(csp, workers * TASKS_PER_WORKER)
+    if not prefixes:
+        return None
+    stop_event = multiprocessing.Event()
+    executor: ProcessPoolExecutor = _executor(csp, (propagation, variable_ordering, value_ordering),
+                                              stop_event, workers)
+    try:
+        pending: Set[Future] = {executor.submit(_solve_prefix, prefix) for prefix in prefixes}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                solution: Optional[Dict[V, D]] = future.result()
+                if solution is not None:
+                    return solution
+        return None
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def parallel_count(
+        csp: CSP[V, D],
+        propagation: 'CSP.Propagation' = CSP.Propagation.NONE,
+        variable_ordering: 'CSP.VariableOrdering' = CSP.VariableOrdering.STATIC,
+        value_ordering: 'CSP.ValueOrdering' = CSP.ValueOrdering.DOMAIN,
+        max_workers: Optional[int] = None,
+) -> int:
+    workers: int = max_workers or multiprocessing.cpu_count()
+    prefixes: List[Dict[V, D]] = split(csp, workers * TASKS_PER_WORKER)
+    if not prefixes:
+        return 0
+    with _executor(csp, (propagation, variable_ordering, value_ordering), None, workers) as executor:
+        return sum(executor.map(_count_prefix, prefixes, chunksize=1))
+
+
+if __name__ == "__main__":
+    from time import perf_counter
+    from queens import QueenConstraint
+
+    size: int = 10
+    columns: List[int] = [x for x in range(1, size + 1)]
+    rows: Dict[int, List[int]] = {column: [x for x in range(1, size + 1)] for column in columns}
+    queens: CSP[int, int] = CSP(columns, rows)
+    queens.add_constraint(QueenConstraint(columns))
+
+    for workers in (1, multiprocessing.cpu_count()):
+        started: float = perf_counter()
+        solution: Optional[Dict[int, int]] = parallel_search(queens, max_workers=workers)
+        found: float = perf_counter()
+        count: int = parallel_count(queens, max_workers=workers)
+        counted: float = perf_counter()
+        print(f"{workers} worker(s): solution {solution} in {found - started:.2f}s, "
+              f"{count} solutions counted in {counted - found:.2f}s")
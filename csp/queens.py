@@ -32,4 +32,5 @@ if __name__ == '__main__':
     if solution is None:
         print("No solution found!")
     else:
-        print(solution)
\ No newline at end of file
+        print(solution)
+        print(f"{csp.count_solutions()} solutions in total")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from csp.csp import Constraint, CSP
+from csp import Constraint, CSP
 from typing import Dict, List, Optional
 
 
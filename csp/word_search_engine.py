@@ -0,0 +1,182 @@
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Set, Tuple, Iterator
+from word_search import Grid, GridLocation, display_grid
+
+
+# (row step, column step): left to right, top to bottom and both diagonals
+DIRECTIONS: List[Tuple[int, int]] = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+# random placements tried for a word before falling back to all of them
+SAMPLES: int = 64
+
+Placement = Tuple[int, int, int]  # (direction, spelling, start cell)
+
+
+class WordSearch:
+    # Word search generation over integer bitmasks, one bit per grid cell
+    # (row * columns + column). A placement is a start cell plus a cell
+    # pattern precomputed per word length and direction, so its mask is one
+    # shift. The grid keeps one mask of occupied cells and one mask per letter,
+    # so a placement fits when the occupied cells it covers already hold its
+    # own letters: a few ANDs instead of comparing cell lists. Words may cross
+    # on shared letters unless overlap=False, and each may be written backwards.
+
+    def __init__(self, rows: int, columns: int, words: List[str], seed: Optional[int] = None,
+                 overlap: bool = True) -> None:
+        self.rows: int = rows
+        self.columns: int = columns
+        self.words: List[str] = [word.upper() for word in words]
+        # solutions are keyed by word, so a repeated word would silently collapse into one
+        repeated: List[str] = sorted({word for word in self.words if self.words.count(word) > 1})
+        if repeated:
+            raise ValueError(f'Words must be distinct, got {", ".join(repeated)} more than once')
+        self.random: random.Random = random.Random(seed)
+        self.overlap: bool = overlap
+        self.steps: List[int] = [dr * columns + dc for dr, dc in DIRECTIONS]
+        self._patterns: Dict[int, List[int]] = {}
+        self._starts: Dict[int, List[List[int]]] = {}
+        for length in {len(word) for word in self.words}:
+            self._patterns[length] = [sum(1 << k * step for k in range(length)) for step in self.steps]
+            self._starts[length] = [self._valid_starts(length, direction) for direction in DIRECTIONS]
+        # per word, per spelling, per direction: letter -> cells it occupies, relative to the start
+        self._letters: Dict[str, List[List[Dict[str, int]]]] = {}
+        for word in self.words:
+            spellings: List[str] = list(dict.fromkeys([word, word[::-1]]))
+            self._letters[word] = [[self._letter_pattern(spelling, step) for step in self.steps]
+                                   for spelling in spellings]
+        self.occupied: int = 0
+        self.letter_masks: Dict[str, int] = {}
+
+    def _valid_starts(self, length: int, direction: Tuple[int, int]) -> List[int]:
+        dr, dc = direction
+        rows: range = range(self.rows - dr * (length - 1))
+        first: int = (length - 1) if dc < 0 else 0
+        last: int = self.columns - (length - 1) if dc > 0 else self.columns
+        return [row * self.columns + column for row in rows for column in range(first, last)]
+
+    @staticmethod
+    def _letter_pattern(spelling: str, step: int) -> Dict[str, int]:
+        pattern: Dict[str, int] = {}
+        for k, letter in enumerate(spelling):
+            pattern[letter] = pattern.get(letter, 0) | 1 << k * step
+        return pattern
+
+    def fits(self, word: str, placement: Placement) -> bool:
+        direction, spelling, start = placement
+        mask: int = self._patterns[len(word)][direction] << start
+        covered: int = self.occupied & mask
+        if not covered:
+            return True
+        if not self.overlap or covered == mask:
+            return False  # a word lying entirely on others would not be a new word
+        matching: int = 0
+        for letter, cells in self._letters[word][spelling][direction].items():
+            matching |= (cells << start) & self.letter_masks.get(letter, 0)
+        return matching == covered
+
+    def _place(self, word: str, placement: Placement) -> int:
+        # returns the cells this word newly took, which is what undo clears
+        direction, spelling, start = placement
+        added: int = (self._patterns[len(word)][direction] << start) & ~self.occupied
+        self.occupied |= added
+        for letter, cells in self._letters[word][spelling][direction].items():
+            self.letter_masks[letter] = self.letter_masks.get(letter, 0) | ((cells << start) & added)
+        return added
+
+    def _remove(self, added: int) -> None:
+        self.occupied &= ~added
+        for letter in self.letter_masks:
+            self.letter_masks[letter] &= ~added
+
+    def _candidates(self, word: str) -> Iterator[Placement]:
+        # Every placement exactly once: a few drawn at random first, the rest
+        # shuffled. Placements are numbered through the options' start lists,
+        # so the random draw needs no list of all placements.
+        starts: List[List[int]] = self._starts[len(word)]
+        options: List[Tuple[int, int]] = [(direction, spelling)
+                                          for direction in range(len(DIRECTIONS))
+                                          for spelling in range(len(self._letters[word]))
+                                          if starts[direction]]
+        if not options:
+            return
+        ends: List[int] = list(accumulate(len(starts[direction]) for direction, _ in options))
+
+        def placement(number: int) -> Placement:
+            option: int = bisect_right(ends, number)
+            direction, spelling = options[option]
+            return direction, spelling, starts[direction][number - (ends[option - 1] if option else 0)]
+
+        sampled: List[int] = self.random.sample(range(ends[-1]), min(SAMPLES, ends[-1]))
+        for number in sampled:
+            yield placement(number)
+        tried: Set[int] = set(sampled)
+        rest: List[int] = [number for number in range(ends[-1]) if number not in tried]
+        self.random.shuffle(rest)
+        for number in rest:
+            yield placement(number)
+
+    def generate(self) -> Optional[Dict[str, List[GridLocation]]]:
+        # Longest words first, each at a random placement that fits, with
+        # iterative backtracking when a word has nowhere left to go.
+        self.occupied = 0
+        self.letter_masks = {}
+        order: List[str] = sorted(self.words, key=len, reverse=True)
+        chosen: List[Placement] = []
+        added: List[int] = []
+        candidates: List[Iterator[Placement]] = [self._candidates(order[0])] if order else []
+        while len(chosen) < len(order):
+            if not candidates:
+                return None
+            word: str = order[len(chosen)]
+            for placement in candidates[-1]:
+                if self.fits(word, placement):
+                    chosen.append(placement)
+                    added.append(self._place(word, placement))
+                    if len(chosen) < len(order):
+                        candidates.append(self._candidates(order[len(chosen)]))
+                    break
+            else:
+                candidates.pop()
+                if chosen:
+                    chosen.pop()
+                    self._remove(added.pop())
+
+        return {word: self.locations(word, placement) for word, placement in zip(order, chosen)}
+
+    def locations(self, word: str, placement: Placement) -> List[GridLocation]:
+        # cells in the order of the word's letters, as word_search.py writes them
+        direction, spelling, start = placement
+        cells: List[int] = [start + k * self.steps[direction] for k in range(len(word))]
+        if spelling == 1:
+            cells.reverse()
+        return [GridLocation(*divmod(cell, self.columns)) for cell in cells]
+
+    def fill(self, solution: Dict[str, List[GridLocation]]) -> Grid:
+        grid: Grid = [[self.random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(self.columns)]
+                      for _ in range(self.rows)]
+        for word, grid_locations in solution.items():
+            for letter, location in zip(word, grid_locations):
+                grid[location.row][location.column] = letter
+        return grid
+
+
+if __name__ == "__main__":
+    from time import perf_counter
+
+    small: WordSearch = WordSearch(9, 9, ["MATTHEW", "JOE", "MARY", "SARAH", "SALLY"])
+    placed: Optional[Dict[str, List[GridLocation]]] = small.generate()
+    if placed is None:
+        print("No solution found!")
+    else:
+        display_grid(small.fill(placed))
+
+    rng: random.Random = random.Random(0)
+    many: List[str] = [''.join(rng.choice('ETAOINSHRDLU') for _ in range(rng.randint(3, 10)))
+                       for _ in range(200)]
+    started: float = perf_counter()
+    large: WordSearch = WordSearch(50, 50, many, seed=0)
+    placed = large.generate()
+    elapsed: float = perf_counter() - started
+    print(f"50x50 with {len(many)} words: {'placed' if placed is not None else 'failed'} in {elapsed:.2f}s")
@@ -0,0 +1,180 @@
+from __future__ import annotations
+import heapq
+from collections import deque
+from enum import Enum
+from itertools import count
+from time import monotonic
+from typing import TypeVar, Generic, Callable, Iterable, Optional, Set, Dict, List, Tuple, Deque, Generator, Iterator
+from generic_search import Node
+
+
+T = TypeVar('T')
+
+
+class EventKind(str, Enum):
+    GENERATED = "generated"
+    EXPANDED = "expanded"
+    SOLUTION = "solution"
+    EXHAUSTED = "exhausted"
+
+
+class SearchEvent(Generic[T]):
+    def __init__(self, kind: EventKind, node: Optional[Node[T]], expanded: int, frontier_size: int) -> None:
+        self.kind: EventKind = kind
+        self.node: Optional[Node[T]] = node
+        self.expanded: int = expanded
+        self.frontier_size: int = frontier_size
+
+    def __repr__(self) -> str:
+        return f'SearchEvent({self.kind.value}, expanded={self.expanded}, frontier={self.frontier_size})'
+
+
+# The iter_* searches mirror dfs/bfs/astar but are generators: they yield a
+# GENERATED event for every new child, an EXPANDED event after every
+# expansion and a SOLUTION event for every goal node found, then keep going
+# until the caller stops iterating. successors may return any iterable; it
+# is consumed one child at a time, so a caller can stop in the middle of an
+# expensive expansion.
+
+def iter_dfs(initial: T, goal_test: Callable[[T], bool],
+             successors: Callable[[T], Iterable[T]]) -> Generator[SearchEvent[T], None, None]:
+    # the stack keeps each node on the path with its half-consumed children,
+    # as _bounded_dfs does, and a node is expanded when its children are asked for
+    root: Node[T] = Node(initial, None)
+    explored: Set[T] = {initial}
+    if goal_test(initial):
+        yield SearchEvent(EventKind.SOLUTION, root, 0, 1)
+    stack: List[Tuple[Node[T], Iterator[T]]] = [(root, iter(successors(initial)))]
+    expanded: int = 1
+    yield SearchEvent(EventKind.EXPANDED, root, expanded, len(stack))
+
+    while stack:
+        current_node, children = stack[-1]
+        for child in children:
+            if child not in explored:
+                break
+        else:
+            stack.pop()
+            continue
+
+        explored.add(child)
+        child_node: Node[T] = Node(child, current_node, current_node.cost + 1)
+        kind: EventKind = EventKind.SOLUTION if goal_test(child) else EventKind.GENERATED
+        yield SearchEvent(kind, child_node, expanded, len(stack))
+        stack.append((child_node, iter(successors(child))))
+        expanded += 1
+        yield SearchEvent(EventKind.EXPANDED, child_node, expanded, len(stack))
+
+    yield SearchEvent(EventKind.EXHAUSTED, None, expanded, 0)
+
+
+def iter_bfs(initial: T, goal_test: Callable[[T], bool],
+             successors: Callable[[T], Iterable[T]]) -> Generator[SearchEvent[T], None, None]:
+    frontier: Deque[Node[T]] = deque([Node(initial, None)])
+    explored: Set[T] = {initial}
+    expanded: int = 0
+
+    if goal_test(initial):
+        yield SearchEvent(EventKind.SOLUTION, frontier[0], expanded, 1)
+
+    while frontier:
+        current_node: Node[T] = frontier.popleft()
+        for child in successors(current_node.state):
+            if child in explored:
+                continue
+            explored.add(child)
+            child_node: Node[T] = Node(child, current_node, current_node.cost + 1)
+            frontier.append(child_node)
+            # goal test on generation, so the caller can stop before the rest
+            # of this state's successors are produced
+            kind: EventKind = EventKind.SOLUTION if goal_test(child) else EventKind.GENERATED
+            yield SearchEvent(kind, child_node, expanded, len(frontier))
+        expanded += 1
+        yield SearchEvent(EventKind.EXPANDED, current_node, expanded, len(frontier))
+
+    yield SearchEvent(EventKind.EXHAUSTED, None, expanded, 0)
+
+
+def iter_astar(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], Iterable[T]],
+        heuristic: Callable[[T], float]
+) -> Generator[SearchEvent[T], None, None]:
+    tiebreak = count()
+    start: Node[T] = Node(initial, None, 0.0, heuristic(initial))
+    frontier: List[Tuple[float, int, Node[T]]] = [(start.heuristic, next(tiebreak), start)]
+    explored: Dict[T, float] = {initial: 0.0}
+    expanded: int = 0
+
+    while frontier:
+        _, _, current_node = heapq.heappop(frontier)
+        if current_node.cost > explored[current_node.state]:
+            continue
+        if goal_test(current_node.state):
+            yield SearchEvent(EventKind.SOLUTION, current_node, expanded, len(frontier))
+
+        new_cost: float = current_node.cost + 1
+        for child in successors(current_node.state):
+            if child not in explored or explored[child] > new_cost:
+                explored[child] = new_cost
+                child_node: Node[T] = Node(child, current_node, new_cost, heuristic(child))
+                heapq.heappush(frontier, (new_cost + child_node.heuristic, next(tiebreak), child_node))
+                yield SearchEvent(EventKind.GENERATED, child_node, expanded, len(frontier))
+        expanded += 1
+        yield SearchEvent(EventKind.EXPANDED, current_node, expanded, len(frontier))
+
+    yield SearchEvent(EventKind.EXHAUSTED, None, expanded, 0)
+
+
+def search_with_budget(
+        events: Generator[SearchEvent[T], None, None],
+        seconds: Optional[float] = None,
+        max_expansions: Optional[int] = None,
+        first_solution: bool = True,
+        on_solution: Optional[Callable[[Node[T]], None]] = None,
+) -> Optional[Node[T]]:
+    # Drives one of the iter_* searches until it finds a solution or runs out
+    # of budget, and returns the cheapest solution seen (the incumbent).
+    deadline: Optional[float] = monotonic() + seconds if seconds is not None else None
+    incumbent: Optional[Node[T]] = None
+    try:
+        for event in events:
+            if event.kind == EventKind.SOLUTION:
+                if incumbent is None or event.node.cost < incumbent.cost:
+                    incumbent = event.node
+                    if on_solution is not None:
+                        on_solution(incumbent)
+                if first_solution:
+                    break
+            elif event.kind == EventKind.EXHAUSTED:
+                break
+            if max_expansions is not None and event.expanded >= max_expansions:
+                break
+            if deadline is not None and monotonic() >= deadline:
+                break
+    finally:
+        events.close()
+    return incumbent
+
+
+if __name__ == "__main__":
+    from generic_search import node_to_path
+    from maze import Maze, MazeLocation, manhattan_distance
+
+    m: Maze = Maze()
+    for event in iter_bfs(m.start, m.goal_test, m.successors):
+        if event.kind == EventKind.SOLUTION:
+            print(event)
+            break
+
+    solution: Optional[Node[MazeLocation]] = search_with_budget(
+        iter_astar(m.start, m.goal_test, m.successors, manhattan_distance(m.goal)),
+        seconds=0.5,
+    )
+    if solution is None:
+        print("No solution found within the budget!")
+    else:
+        path: List[MazeLocation] = node_to_path(solution)
+        m.mark(path)
+        print(m)
@@ -0,0 +1,146 @@
+from math import inf
+from typing import Dict, List, Optional, Tuple, Set
+from generic_search import IndexedPriorityQueue
+from maze import Maze, MazeLocation, Cell
+
+
+Key = Tuple[float, float]
+
+
+class DStarLite:
+    # D* Lite (Koenig and Likhachev) bound to one maze. The search runs from
+    # the goal back to the agent, so when cells change only the g/rhs values
+    # around them are repaired and the next plan reuses everything else.
+    # Cell changes arrive through Maze.subscribe and are applied on replan().
+
+    def __init__(self, maze: Maze) -> None:
+        self._maze: Maze = maze
+        self.start: MazeLocation = maze.start
+        self.goal: MazeLocation = maze.goal
+        self._last: MazeLocation = maze.start
+        self._km: float = 0.0
+        self._g: Dict[MazeLocation, float] = {}
+        self._rhs: Dict[MazeLocation, float] = {self.goal: 0.0}
+        self._frontier: IndexedPriorityQueue[MazeLocation] = IndexedPriorityQueue()
+        self._frontier.push(self.goal, self._key(self.goal))
+        self._pending: Set[MazeLocation] = set()
+        self.expanded: int = 0
+        maze.subscribe(self._on_cells_changed)
+
+    def close(self) -> None:
+        self._maze.unsubscribe(self._on_cells_changed)
+
+    def _heuristic(self, a: MazeLocation, b: MazeLocation) -> float:
+        return abs(a.row - b.row) + abs(a.column - b.column)
+
+    def _blocked(self, ml: MazeLocation) -> bool:
+        return self._maze.cell(ml) == Cell.BLOCKED
+
+    def _neighbors(self, ml: MazeLocation) -> List[MazeLocation]:
+        # every in-bounds neighbour, blocked or not, since a blocked cell may open later
+        result: List[MazeLocation] = []
+        if ml.row + 1 < self._maze.rows:
+            result.append(MazeLocation(ml.row + 1, ml.column))
+        if ml.row > 0:
+            result.append(MazeLocation(ml.row - 1, ml.column))
+        if ml.column > 0:
+            result.append(MazeLocation(ml.row, ml.column - 1))
+        if ml.column + 1 < self._maze.columns:
+            result.append(MazeLocation(ml.row, ml.column + 1))
+        return result
+
+    def _cost(self, a: MazeLocation, b: MazeLocation) -> float:
+        return inf if self._blocked(a) or self._blocked(b) else 1.0
+
+    def _key(self, ml: MazeLocation) -> Key:
+        best: float = min(self._g.get(ml, inf), self._rhs.get(ml, inf))
+        return best + self._heuristic(self.start, ml) + self._km, best
+
+    def _update_vertex(self, ml: MazeLocation) -> None:
+        if ml != self.goal:
+            self._rhs[ml] = min((self._cost(ml, n) + self._g.get(n, inf) for n in self._neighbors(ml)), default=inf)
+        consistent: bool = self._g.get(ml, inf) == self._rhs.get(ml, inf)
+        if ml in self._frontier:
+            if consistent:
+                self._frontier.remove(ml)
+            else:
+                self._frontier.update(ml, self._key(ml))
+        elif not consistent:
+            self._frontier.push(ml, self._key(ml))
+
+    def _compute_shortest_path(self) -> None:
+        frontier: IndexedPriorityQueue[MazeLocation] = self._frontier
+        while not frontier.empty and (frontier.priority(frontier.peek()) < self._key(self.start)
+                                      or self._rhs.get(self.start, inf) != self._g.get(self.start, inf)):
+            u: MazeLocation = frontier.peek()
+            old_key: Key = frontier.priority(u)
+            new_key: Key = self._key(u)
+            self.expanded += 1
+            if old_key < new_key:
+                frontier.update(u, new_key)
+            elif self._g.get(u, inf) > self._rhs.get(u, inf):
+                self._g[u] = self._rhs[u]
+                frontier.remove(u)
+                for n in self._neighbors(u):
+                    self._update_vertex(n)
+            else:
+                self._g[u] = inf
+                self._update_vertex(u)
+                for n in self._neighbors(u):
+                    self._update_vertex(n)
+
+    def _on_cells_changed(self, changed: List[MazeLocation]) -> None:
+        self._pending.update(changed)
+
+    def move_to(self, location: MazeLocation) -> None:
+        # the agent moved; keys computed against the old position stay valid via km
+        self.start = location
+        self._km += self._heuristic(self._last, location)
+        self._last = location
+
+    def replan(self) -> Optional[List[MazeLocation]]:
+        if self._pending:
+            changed: Set[MazeLocation] = set(self._pending)
+            for ml in self._pending:
+                changed.update(self._neighbors(ml))
+            self._pending.clear()
+            for ml in changed:
+                self._update_vertex(ml)
+        self._compute_shortest_path()
+        return self.path()
+
+    def path(self) -> Optional[List[MazeLocation]]:
+        if self._g.get(self.start, inf) == inf:
+            return None
+        path: List[MazeLocation] = [self.start]
+        current: MazeLocation = self.start
+        while current != self.goal:
+            current = min(self._neighbors(current), key=lambda n: self._cost(current, n) + self._g.get(n, inf))
+            if self._g.get(current, inf) == inf or len(path) > self._maze.rows * self._maze.columns:
+                return None
+            path.append(current)
+        return path
+
+
+if __name__ == "__main__":
+    from generic_search import astar, SearchStats
+    from maze import manhattan_distance
+
+    m: Maze = Maze(60, 60, 0.2, goal=MazeLocation(59, 59))
+    planner: DStarLite = DStarLite(m)
+    plan: Optional[List[MazeLocation]] = planner.replan()
+    print(f"Initial plan: {None if plan is None else len(plan)} cells, {planner.expanded} expansions")
+
+    if plan is not None and len(plan) > 3:
+        planner.move_to(plan[1])
+        m.set_cell(plan[len(plan) // 2], Cell.BLOCKED)
+        before: int = planner.expanded
+        plan = planner.replan()
+        print(f"Replanned: {None if plan is None else len(plan)} cells, {planner.expanded - before} expansions")
+
+        stats: SearchStats = SearchStats()
+        astar(planner.start, m.goal_test, m.successors, manhattan_distance(m.goal), stats)
+        print(f"A* from scratch: {stats.expanded} expansions")
+        if plan is not None:
+            m.mark(plan)
+            print(m)
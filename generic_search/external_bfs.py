@@ -0,0 +1,234 @@
+from __future__ import annotations
+import heapq
+import io
+import os
+import pickle
+import struct
+import tempfile
+from typing import TypeVar, Generic, Callable, List, Optional, Tuple, Iterator, Iterable, BinaryIO
+from generic_search import Node
+
+
+T = TypeVar('T')
+
+Record = Tuple[bytes, bytes]  # (state, parent state), both encoded
+
+_LENGTH: struct.Struct = struct.Struct('<I')
+NO_PARENT: bytes = b''
+
+
+def _dumps(state: object) -> bytes:
+    # the memo would make equal states pickle differently, e.g. (s, s) and (s, t) for t == s
+    buffer: io.BytesIO = io.BytesIO()
+    pickler: pickle.Pickler = pickle.Pickler(buffer)
+    pickler.fast = True
+    pickler.dump(state)
+    return buffer.getvalue()
+
+
+def _write_record(file: BinaryIO, state: bytes, parent: bytes) -> None:
+    file.write(_LENGTH.pack(len(state)))
+    file.write(state)
+    file.write(_LENGTH.pack(len(parent)))
+    file.write(parent)
+
+
+def _read_records(path: str) -> Iterator[Record]:
+    with open(path, 'rb', buffering=1 << 20) as file:
+        while True:
+            header: bytes = file.read(_LENGTH.size)
+            if not header:
+                return
+            state: bytes = file.read(_LENGTH.unpack(header)[0])
+            parent: bytes = file.read(_LENGTH.unpack(file.read(_LENGTH.size))[0])
+            yield state, parent
+
+
+def _write_run(path: str, records: Iterable[Record]) -> None:
+    with open(path, 'wb', buffering=1 << 20) as file:
+        for state, parent in records:
+            _write_record(file, state, parent)
+
+
+def _unique(records: Iterable[Record]) -> Iterator[Record]:
+    # records are sorted by state, keep the first parent seen for each state
+    previous: Optional[bytes] = None
+    for state, parent in records:
+        if state != previous:
+            previous = state
+            yield state, parent
+
+
+def _not_visited(records: Iterable[Record], visited_path: str, merged_path: str) -> Iterator[Record]:
+    # delayed duplicate detection against one sorted run of every state seen
+    # so far; the same pass writes the run again with the new states merged in
+    visited: Iterator[Record] = _read_records(visited_path)
+    head: Optional[bytes] = next(visited, (None, None))[0]
+    with open(merged_path, 'wb', buffering=1 << 20) as file:
+        for state, parent in records:
+            while head is not None and head < state:
+                _write_record(file, head, NO_PARENT)
+                head = next(visited, (None, None))[0]
+            if head == state:
+                continue
+            _write_record(file, state, NO_PARENT)
+            yield state, parent
+        while head is not None:
+            _write_record(file, head, NO_PARENT)
+            head = next(visited, (None, None))[0]
+
+
+def _not_in(records: Iterable[Record], layer_paths: List[str]) -> Iterator[Record]:
+    # delayed duplicate detection: one merge pass against a few sorted earlier layers
+    readers: List[Iterator[Record]] = [_read_records(path) for path in layer_paths]
+    heads: List[Optional[bytes]] = [next(reader, (None, None))[0] for reader in readers]
+    for state, parent in records:
+        seen: bool = False
+        for i, reader in enumerate(readers):
+            while heads[i] is not None and heads[i] < state:
+                heads[i] = next(reader, (None, None))[0]
+            if heads[i] == state:
+                seen = True
+        if not seen:
+            yield state, parent
+
+
+class ExternalBFS(Generic[T]):
+    # Breadth-first search whose frontier and explored set live on disk, one
+    # sorted file per layer. Children are buffered up to max_buffer records,
+    # sorted into run files, merged, and filtered against earlier layers by a
+    # merge pass, so RAM use does not grow with the number of states.
+    #
+    # With dedupe_layers=None every state seen so far is kept in one sorted
+    # visited run; otherwise children are only checked against that many of
+    # the latest layers, each of which is open during the merge.
+    #
+    # States go to disk through encode/decode. Equal states must encode to
+    # equal bytes. The default pickles without the memo, which holds for ints,
+    # strs, bytes and (named) tuples of them; floats, sets, dicts or states
+    # mixing bools with ints need an encode of their own.
+
+    def __init__(
+            self,
+            directory: Optional[str] = None,
+            max_buffer: int = 1 << 20,
+            dedupe_layers: Optional[int] = None,
+            encode: Callable[[T], bytes] = _dumps,
+            decode: Callable[[bytes], T] = pickle.loads,
+    ) -> None:
+        self._directory: Optional[str] = directory
+        self._max_buffer: int = max_buffer
+        # None checks every earlier layer; 2 is enough when every move can be undone
+        self._dedupe_layers: Optional[int] = dedupe_layers
+        self._encode: Callable[[T], bytes] = encode
+        self._decode: Callable[[bytes], T] = decode
+        self.layer_sizes: List[int] = []
+
+    def search(self, initial: T, goal_test: Callable[[T], bool],
+               successors: Callable[[T], List[T]]) -> Optional[Node[T]]:
+        if self._directory is not None:
+            os.makedirs(self._directory, exist_ok=True)
+            return self._search(self._directory, initial, goal_test, successors)
+        with tempfile.TemporaryDirectory(prefix='external_bfs_') as directory:
+            return self._search(directory, initial, goal_test, successors)
+
+    def _search(self, directory: str, initial: T, goal_test: Callable[[T], bool],
+                successors: Callable[[T], List[T]]) -> Optional[Node[T]]:
+        encode, decode = self._encode, self._decode
+        self.layer_sizes = [1]
+        layers: List[str] = [os.path.join(directory, 'layer_0')]
+        _write_run(layers[0], [(encode(initial), NO_PARENT)])
+        if goal_test(initial):
+            return Node(initial, None)
+        visited: str = layers[0]
+
+        while True:
+            runs: List[str] = self._expand(directory, layers[-1], successors)
+            candidates: Iterator[Record] = _unique(heapq.merge(*[_read_records(run) for run in runs]))
+            if self._dedupe_layers is None:
+                merged: str = os.path.join(directory, f'visited_{len(layers)}')
+                fresh: Iterator[Record] = _not_visited(candidates, visited, merged)
+            else:
+                fresh = _not_in(candidates, layers[-self._dedupe_layers:])
+
+            layer_path: str = os.path.join(directory, f'layer_{len(layers)}')
+            size: int = 0
+            goal: Optional[Record] = None
+            with open(layer_path, 'wb', buffering=1 << 20) as file:
+                for state, parent in fresh:
+                    _write_record(file, state, parent)
+                    size += 1
+                    if goal is None and goal_test(decode(state)):
+                        goal = (state, parent)
+            for run in runs:
+                os.remove(run)
+            if self._dedupe_layers is None:
+                if visited != layers[0]:
+                    os.remove(visited)
+                visited = merged
+
+            layers.append(layer_path)
+            self.layer_sizes.append(size)
+            if goal is not None:
+                return self._rebuild(layers, goal)
+            if size == 0:
+                return None
+
+    def _expand(self, directory: str, layer_path: str, successors: Callable[[T], List[T]]) -> List[str]:
+        encode, decode = self._encode, self._decode
+        runs: List[str] = []
+        buffer: List[Record] = []
+
+        def spill() -> None:
+            buffer.sort()
+            run: str = os.path.join(directory, f'run_{len(runs)}')
+            _write_run(run, _unique(buffer))
+            runs.append(run)
+            buffer.clear()
+
+        for state, _ in _read_records(layer_path):
+            for child in successors(decode(state)):
+                buffer.append((encode(child), state))
+                if len(buffer) >= self._max_buffer:
+                    spill()
+        if buffer or not runs:
+            spill()
+        return runs
+
+    def _rebuild(self, layers: List[str], goal: Record) -> Node[T]:
+        # walk back one layer at a time, scanning each layer for the parent record
+        records: List[Record] = [goal]
+        for layer_path in reversed(layers[:-1]):
+            wanted: bytes = records[-1][1]
+            for state, parent in _read_records(layer_path):
+                if state == wanted:
+                    records.append((state, parent))
+                    break
+
+        node: Optional[Node[T]] = None
+        for cost, (state, _) in enumerate(reversed(records)):
+            node = Node(self._decode(state), node, float(cost))
+        return node
+
+
+def external_bfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]],
+                 directory: Optional[str] = None, max_buffer: int = 1 << 20,
+                 dedupe_layers: Optional[int] = None) -> Optional[Node[T]]:
+    return ExternalBFS(directory, max_buffer, dedupe_layers).search(initial, goal_test, successors)
+
+
+if __name__ == "__main__":
+    from generic_search import node_to_path
+    from maze import Maze, MazeLocation
+
+    m: Maze = Maze()
+    # a tiny buffer forces several sorted runs per layer
+    searcher: ExternalBFS[MazeLocation] = ExternalBFS(max_buffer=4, dedupe_layers=2)
+    solution: Optional[Node[MazeLocation]] = searcher.search(m.start, m.goal_test, m.successors)
+    if solution is None:
+        print("No solution found using external-memory breadth-first search!")
+    else:
+        path: List[MazeLocation] = node_to_path(solution)
+        m.mark(path)
+        print(m)
+        print(f"Layer sizes: {searcher.layer_sizes}")
@@ -1,13 +1,24 @@
 from __future__ import annotations
 import heapq
+from math import inf
+from time import perf_counter
+from bisect import bisect_left
 from collections import deque
 from typing import (TypeVar, Iterable, Sequence, Generic, Optional,
-                    List, Callable, Set, Deque, Dict, Any)
+                    List, Callable, Set, Deque, Dict, Any, Tuple, Iterator, Union)
 from typing_extensions import Protocol
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it only adds a fast path for numeric arrays
+    np = None
+
 
 T = TypeVar('T')
 
+# batches larger than this are sorted before the numpy searchsorted
+SORTED_BATCH_MIN: int = 1 << 16
+
 
 def linear_contains(iterable: Iterable[T], key: T) -> bool:
     for item in iterable:
@@ -51,6 +62,79 @@ def binary_contains(sequence: Sequence[C], key: C) -> bool:
     return False
 
 
+def linear_contains_many(iterable: Iterable[T], keys: Sequence[T]) -> List[bool]:
+    # One pass over the items for all keys at once. Hashable keys are found
+    # through a dict, unhashable keys and unhashable items are compared with
+    # == as linear_contains would, so the items are never read twice.
+    mask: List[bool] = [False] * len(keys)
+    hashed: Dict[Any, List[int]] = {}
+    unhashed: List[int] = []
+    for i, key in enumerate(keys):
+        try:
+            hashed.setdefault(key, []).append(i)
+        except TypeError:
+            unhashed.append(i)
+
+    for item in iterable:
+        try:
+            hits: List[int] = hashed.pop(item, [])
+        except TypeError:
+            hits = []
+            for key in [key for key in hashed if key == item]:
+                hits.extend(hashed.pop(key))
+        if unhashed:
+            hits.extend(i for i in unhashed if keys[i] == item)
+            unhashed = [i for i in unhashed if not keys[i] == item]
+        for i in hits:
+            mask[i] = True
+        if not hashed and not unhashed:
+            break
+    return mask
+
+
+def binary_contains_many(sequence: Sequence[C], keys: Sequence[C]) -> Union[List[bool], Any]:
+    # sequence has to be sorted, as for binary_contains
+    if np is not None and isinstance(sequence, np.ndarray) and sequence.dtype.kind in 'biuf':
+        needles = np.asarray(keys)
+        if not len(sequence):
+            return np.zeros(len(needles), dtype=bool)
+        # searching in key order keeps the probes cache friendly on big batches
+        order = np.argsort(needles) if len(needles) > SORTED_BATCH_MIN else None
+        if order is not None:
+            needles = needles[order]
+        positions = np.searchsorted(sequence, needles)
+        positions[positions == len(sequence)] = 0  # out of range keys compare unequal below
+        hits = sequence[positions] == needles
+        if order is None:
+            return hits
+        mask = np.empty(len(hits), dtype=bool)
+        mask[order] = hits
+        return mask
+
+    if len(keys) == 0:
+        return []
+    if len(keys) * max(1, len(sequence).bit_length()) < len(sequence):
+        # few keys: a bisect per key touches less than a full merge
+        mask: List[bool] = []
+        for key in keys:
+            position: int = bisect_left(sequence, key)
+            mask.append(position < len(sequence) and sequence[position] == key)
+        return mask
+
+    # many keys: sort them once and walk both sorted lists together
+    order: List[int] = sorted(range(len(keys)), key=keys.__getitem__)
+    result: List[bool] = [False] * len(keys)
+    index: int = 0
+    for key_index in order:
+        key: C = keys[key_index]
+        while index < len(sequence) and sequence[index] < key:
+            index += 1
+        if index == len(sequence):
+            break
+        result[key_index] = sequence[index] == key
+    return result
+
+
 class Stack(Generic[T]):
 
     def __init__(self) -> None:
@@ -66,6 +150,9 @@ class Stack(Generic[T]):
     def pop(self) -> T:
         return self._container.pop()
 
+    def __len__(self) -> int:
+        return len(self._container)
+
     def __repr__(self) -> str:
         return repr(self._container)
 
@@ -84,6 +171,9 @@ class Queue(Generic[T]):
     def pop(self) -> T:
         return self._container.popleft()
 
+    def __len__(self) -> int:
+        return len(self._container)
+
     def __repr__(self) -> str:
         return repr(self._container)
 
@@ -103,10 +193,116 @@ class PriorityQueue(Generic[T]):
     def pop(self) -> T:
         return heapq.heappop(self._container)
 
+    def __len__(self) -> int:
+        return len(self._container)
+
     def __repr__(self) -> str:
         return repr(self._container)
 
 
+class IndexedPriorityQueue(Generic[T]):
+    # Binary heap that knows where every item sits, so an item's priority
+    # can be lowered in place instead of pushing a duplicate entry.
+
+    def __init__(self) -> None:
+        self._heap: List[T] = []
+        self._priorities: Dict[T, float] = {}
+        self._positions: Dict[T, int] = {}
+
+    @property
+    def empty(self) -> bool:
+        return not self._heap
+
+    def __contains__(self, item: T) -> bool:
+        return item in self._positions
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def priority(self, item: T) -> float:
+        return self._priorities[item]
+
+    def push(self, item: T, priority: float) -> None:
+        if item in self._positions:
+            raise KeyError('Item is already in the queue, use decrease_key')
+        self._priorities[item] = priority
+        self._positions[item] = len(self._heap)
+        self._heap.append(item)
+        self._sift_up(len(self._heap) - 1)
+
+    def decrease_key(self, item: T, priority: float) -> None:
+        if priority > self._priorities[item]:
+            raise ValueError('New priority is larger than the current one')
+        self._priorities[item] = priority
+        self._sift_up(self._positions[item])
+
+    def update(self, item: T, priority: float) -> None:
+        # change the priority in either direction
+        old: float = self._priorities[item]
+        self._priorities[item] = priority
+        if priority < old:
+            self._sift_up(self._positions[item])
+        else:
+            self._sift_down(self._positions[item])
+
+    def peek(self) -> T:
+        return self._heap[0]
+
+    def remove(self, item: T) -> None:
+        heap: List[T] = self._heap
+        index: int = self._positions.pop(item)
+        del self._priorities[item]
+        last: T = heap.pop()
+        if index < len(heap):
+            heap[index] = last
+            self._positions[last] = index
+            self._sift_up(index)
+            self._sift_down(self._positions[last])
+
+    def pop(self) -> T:
+        top: T = self._heap[0]
+        self.remove(top)
+        return top
+
+    def _sift_up(self, index: int) -> None:
+        heap: List[T] = self._heap
+        priorities: Dict[T, float] = self._priorities
+        item: T = heap[index]
+        priority: float = priorities[item]
+        while index > 0:
+            parent: int = (index - 1) >> 1
+            if priorities[heap[parent]] <= priority:
+                break
+            heap[index] = heap[parent]
+            self._positions[heap[index]] = index
+            index = parent
+        heap[index] = item
+        self._positions[item] = index
+
+    def _sift_down(self, index: int) -> None:
+        heap: List[T] = self._heap
+        priorities: Dict[T, float] = self._priorities
+        size: int = len(heap)
+        item: T = heap[index]
+        priority: float = priorities[item]
+        while True:
+            child: int = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and priorities[heap[child + 1]] < priorities[heap[child]]:
+                child += 1
+            if priorities[heap[child]] >= priority:
+                break
+            heap[index] = heap[child]
+            self._positions[heap[index]] = index
+            index = child
+        heap[index] = item
+        self._positions[item] = index
+
+    def __repr__(self) -> str:
+        return repr(self._heap)
+
+
 class Node(Generic[T]):
     def __init__(
             self,
@@ -124,73 +320,382 @@ class Node(Generic[T]):
         return (self.cost + self.heuristic) < (other.cost + other.heuristic)
 
 
-def dfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]) -> Optional[Node[T]]:
+class SearchStats:
+    # Optional observer for dfs, bfs and astar. Callbacks are only wrapped in
+    # timers when a SearchStats is passed, so searches without one pay for a
+    # single None check per expansion.
+
+    def __init__(self) -> None:
+        self.expanded: int = 0
+        self.generated: int = 0
+        self.frontier_peak: int = 0
+        self.explored_peak: int = 0
+        self.goal_test_seconds: float = 0.0
+        self.successors_seconds: float = 0.0
+        self.heuristic_seconds: float = 0.0
+        self.frontier_seconds: float = 0.0
+        self.wall_seconds: float = 0.0
+
+    def timed(self, func: Callable[..., Any], counter: str) -> Callable[..., Any]:
+        def wrapper(*args: Any) -> Any:
+            started: float = perf_counter()
+            try:
+                return func(*args)
+            finally:
+                setattr(self, counter, getattr(self, counter) + perf_counter() - started)
+
+        return wrapper
+
+    def record_expansion(self, frontier_size: int, explored_size: int) -> None:
+        self.expanded += 1
+        if frontier_size > self.frontier_peak:
+            self.frontier_peak = frontier_size
+        if explored_size > self.explored_peak:
+            self.explored_peak = explored_size
+
+    def __repr__(self) -> str:
+        return (f'SearchStats(expanded={self.expanded}, generated={self.generated}, '
+                f'frontier_peak={self.frontier_peak}, explored_peak={self.explored_peak}, '
+                f'goal_test={self.goal_test_seconds:.6f}s, successors={self.successors_seconds:.6f}s, '
+                f'heuristic={self.heuristic_seconds:.6f}s, frontier={self.frontier_seconds:.6f}s, '
+                f'wall={self.wall_seconds:.6f}s)')
+
+
+def dfs(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], List[T]],
+        stats: Optional[SearchStats] = None,
+) -> Optional[Node[T]]:
     frontier: Stack[Node[T]] = Stack()
-    frontier.push(Node(initial, None))
+    push, pop = frontier.push, frontier.pop
+    if stats is not None:
+        started: float = perf_counter()
+        goal_test = stats.timed(goal_test, 'goal_test_seconds')
+        successors = stats.timed(successors, 'successors_seconds')
+        push, pop = stats.timed(push, 'frontier_seconds'), stats.timed(pop, 'frontier_seconds')
+    push(Node(initial, None))
 
     explored: Set[T] = {initial}
 
-    while not frontier.empty:
-        current_node: Node[T] = frontier.pop()
-        current_state: T = current_node.state
+    try:
+        while not frontier.empty:
+            current_node: Node[T] = pop()
+            current_state: T = current_node.state
 
-        if goal_test(current_state):
-            return current_node
+            if goal_test(current_state):
+                return current_node
 
-        for child in successors(current_state):
-            if child in explored:
-                continue
-            explored.add(child)
-            frontier.push(Node(child, current_node))
+            for child in successors(current_state):
+                if child in explored:
+                    continue
+                explored.add(child)
+                push(Node(child, current_node))
+                if stats is not None:
+                    stats.generated += 1
 
-    return None
+            if stats is not None:
+                stats.record_expansion(len(frontier), len(explored))
+
+        return None
+    finally:
+        if stats is not None:
+            stats.wall_seconds += perf_counter() - started
 
 
-def bfs(initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]) -> Optional[Node[T]]:
+def bfs(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], List[T]],
+        stats: Optional[SearchStats] = None,
+) -> Optional[Node[T]]:
     frontier: Queue[Node[T]] = Queue()
-    frontier.push(Node(initial, None))
+    push, pop = frontier.push, frontier.pop
+    if stats is not None:
+        started: float = perf_counter()
+        goal_test = stats.timed(goal_test, 'goal_test_seconds')
+        successors = stats.timed(successors, 'successors_seconds')
+        push, pop = stats.timed(push, 'frontier_seconds'), stats.timed(pop, 'frontier_seconds')
+    push(Node(initial, None))
     explored: Set[T] = {initial}
 
+    try:
+        while not frontier.empty:
+            current_node = pop()
+            current_state = current_node.state
+
+            if goal_test(current_state):
+                return current_node
+
+            for child in successors(current_state):
+                if child in explored:
+                    continue
+                explored.add(child)
+                push(Node(child, current_node))
+                if stats is not None:
+                    stats.generated += 1
+
+            if stats is not None:
+                stats.record_expansion(len(frontier), len(explored))
+
+        return None
+    finally:
+        if stats is not None:
+            stats.wall_seconds += perf_counter() - started
+
+
+def _expand_layer(
+        frontier: List[T],
+        neighbors: Callable[[T], List[T]],
+        parents: Dict[T, Optional[T]],
+        other_parents: Dict[T, Optional[T]],
+) -> Tuple[List[T], Optional[T]]:
+    next_frontier: List[T] = []
+    for state in frontier:
+        for neighbor in neighbors(state):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = state
+            if neighbor in other_parents:
+                return next_frontier, neighbor
+            next_frontier.append(neighbor)
+    return next_frontier, None
+
+
+def bidirectional_bfs(
+        initial: T,
+        goal: T,
+        successors: Callable[[T], List[T]],
+        predecessors: Callable[[T], List[T]],
+) -> Optional[Node[T]]:
+    forward_parents: Dict[T, Optional[T]] = {initial: None}
+    backward_parents: Dict[T, Optional[T]] = {goal: None}
+    forward_frontier: List[T] = [initial]
+    backward_frontier: List[T] = [goal]
+    meeting: Optional[T] = initial if initial == goal else None
+
+    while meeting is None and forward_frontier and backward_frontier:
+        # always grow the smaller side, it is the cheaper layer to expand
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = _expand_layer(forward_frontier, successors,
+                                                      forward_parents, backward_parents)
+        else:
+            backward_frontier, meeting = _expand_layer(backward_frontier, predecessors,
+                                                       backward_parents, forward_parents)
+
+    if meeting is None:
+        return None
+
+    states: List[T] = []
+    state: Optional[T] = meeting
+    while state is not None:
+        states.append(state)
+        state = forward_parents[state]
+    states.reverse()
+    state = backward_parents[meeting]
+    while state is not None:
+        states.append(state)
+        state = backward_parents[state]
+
+    node: Optional[Node[T]] = None
+    for cost, state in enumerate(states):
+        node = Node(state, node, float(cost))
+    return node
+
+
+def astar(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], List[T]],
+        heuristic: Callable[[T], float],
+        stats: Optional[SearchStats] = None,
+) -> Optional[Node[T]]:
+    frontier: PriorityQueue[Node[T]] = PriorityQueue()
+    push, pop = frontier.push, frontier.pop
+    if stats is not None:
+        started: float = perf_counter()
+        goal_test = stats.timed(goal_test, 'goal_test_seconds')
+        successors = stats.timed(successors, 'successors_seconds')
+        heuristic = stats.timed(heuristic, 'heuristic_seconds')
+        push, pop = stats.timed(push, 'frontier_seconds'), stats.timed(pop, 'frontier_seconds')
+    push(Node(initial, None, 0.0, heuristic(initial)))
+
+    explored: Dict[T, float] = {initial: 0.0}
+
+    try:
+        while not frontier.empty:
+            current_node: Node[T] = pop()
+            current_state: T = current_node.state
+
+            if current_node.cost > explored[current_state]:
+                continue  # a cheaper path to this state was pushed after this one
+
+            if goal_test(current_state):
+                return current_node
+
+            for child in successors(current_state):
+                new_cost: float = current_node.cost + 1
+
+                if child not in explored or explored[child] > new_cost:
+                    explored[child] = new_cost
+                    push(Node(child, current_node, new_cost, heuristic(child)))
+                    if stats is not None:
+                        stats.generated += 1
+
+            if stats is not None:
+                stats.record_expansion(len(frontier), len(explored))
+
+        return None
+    finally:
+        if stats is not None:
+            stats.wall_seconds += perf_counter() - started
+
+
+def weighted_astar(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], Iterable[Tuple[T, float]]],
+        heuristic: Callable[[T], float]
+) -> Optional[Node[T]]:
+    frontier: IndexedPriorityQueue[T] = IndexedPriorityQueue()
+    nodes: Dict[T, Node[T]] = {initial: Node(initial, None, 0.0, heuristic(initial))}
+    frontier.push(initial, nodes[initial].heuristic)
+    # with a consistent heuristic a state is final once popped
+    closed: Set[T] = set()
+
     while not frontier.empty:
-        current_node = frontier.pop()
-        current_state = current_node.state
+        current_state: T = frontier.pop()
+        current_node: Node[T] = nodes[current_state]
 
         if goal_test(current_state):
             return current_node
+        closed.add(current_state)
 
-        for child in successors(current_state):
-            if child in explored:
+        for child, step_cost in successors(current_state):
+            if child in closed:
                 continue
-            explored.add(child)
-            frontier.push(Node(child, current_node))
+            new_cost: float = current_node.cost + step_cost
+            child_node: Optional[Node[T]] = nodes.get(child)
+
+            if child_node is None:
+                child_node = Node(child, current_node, new_cost, heuristic(child))
+                nodes[child] = child_node
+                frontier.push(child, new_cost + child_node.heuristic)
+            elif new_cost < child_node.cost:
+                child_node.parent = current_node
+                child_node.cost = new_cost
+                frontier.decrease_key(child, new_cost + child_node.heuristic)
 
     return None
 
 
-def astar(
+def _bounded_dfs(
+        root: Node[T],
+        bound: float,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], List[T]],
+        heuristic: Callable[[T], float],
+) -> Tuple[Optional[Node[T]], float]:
+    # the stack only ever holds the current path, so memory is linear in depth
+    next_bound: float = inf
+    stack: List[Tuple[Node[T], Iterator[T]]] = [(root, iter(successors(root.state)))]
+    on_path: Set[T] = {root.state}
+
+    while stack:
+        current_node, children = stack[-1]
+        child: Optional[T] = next(children, None)
+        if child is None:
+            stack.pop()
+            on_path.discard(current_node.state)
+            continue
+        if child in on_path:
+            continue
+
+        child_node: Node[T] = Node(child, current_node, current_node.cost + 1, heuristic(child))
+        f: float = child_node.cost + child_node.heuristic
+        if f > bound:
+            next_bound = min(next_bound, f)
+            continue
+        if goal_test(child):
+            return child_node, bound
+
+        on_path.add(child)
+        stack.append((child_node, iter(successors(child))))
+
+    return None, next_bound
+
+
+def ida_star(
         initial: T,
         goal_test: Callable[[T], bool],
         successors: Callable[[T], List[T]],
         heuristic: Callable[[T], float]
 ) -> Optional[Node[T]]:
-    frontier: PriorityQueue[Node[T]] = PriorityQueue()
-    frontier.push(Node(initial, None, 0.0, heuristic(initial)))
+    root: Node[T] = Node(initial, None, 0.0, heuristic(initial))
+    if goal_test(initial):
+        return root
 
-    explored: Dict[T, float] = {initial: 0.0}
+    bound: float = root.heuristic
+    while bound < inf:
+        solution, bound = _bounded_dfs(root, bound, goal_test, successors, heuristic)
+        if solution is not None:
+            return solution
 
-    while not frontier.empty:
-        current_node: Node[T] = frontier.pop()
-        current_state: Node[T] = current_node.state
+    return None
 
-        if goal_test(current_state):
-            return current_node
 
-        for child in successors(current_state):
-            new_cost: float = current_node.cost + 1
+def _rbfs_frame(
+        node: Node[T],
+        f_node: float,
+        f_limit: float,
+        on_path: Set[T],
+        successors: Callable[[T], List[T]],
+        heuristic: Callable[[T], float],
+) -> List[Any]:
+    children: List[Node[T]] = [Node(child, node, node.cost + 1, heuristic(child))
+                               for child in successors(node.state) if child not in on_path]
+    # a child inherits its parent's backed-up value if that is larger
+    f_values: List[float] = [max(child.cost + child.heuristic, f_node) for child in children]
+    return [node, children, f_values, f_limit, -1]
+
 
-            if new_cost not in explored or explored[new_cost] > new_cost:
-                explored[child] = new_cost
-                frontier.push(Node(child, current_node, new_cost, heuristic(child)))
+def rbfs(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], List[T]],
+        heuristic: Callable[[T], float]
+) -> Optional[Node[T]]:
+    # Recursive best-first search run on an explicit stack, one frame per
+    # node on the current path: [node, children, their f values, f limit,
+    # index of the child being searched]. A frame whose best child exceeds
+    # its limit pops and backs that value up into its parent's f values.
+    root: Node[T] = Node(initial, None, 0.0, heuristic(initial))
+    if goal_test(initial):
+        return root
+    on_path: Set[T] = {initial}
+    stack: List[List[Any]] = [_rbfs_frame(root, root.heuristic, inf, on_path, successors, heuristic)]
+
+    while stack:
+        frame: List[Any] = stack[-1]
+        node, children, f_values, f_limit, _ = frame
+        best: int = min(range(len(children)), key=f_values.__getitem__) if children else -1
+        backed_up: float = f_values[best] if children else inf
+        if backed_up > f_limit or backed_up == inf:
+            stack.pop()
+            on_path.discard(node.state)
+            if stack:
+                parent: List[Any] = stack[-1]
+                parent[2][parent[4]] = backed_up
+            continue
+
+        alternative: float = min((f for i, f in enumerate(f_values) if i != best), default=inf)
+        child: Node[T] = children[best]
+        if goal_test(child.state):
+            return child
+        frame[4] = best
+        on_path.add(child.state)
+        stack.append(_rbfs_frame(child, backed_up, min(f_limit, alternative), on_path,
+                                 successors, heuristic))
 
     return None
 
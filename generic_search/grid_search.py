@@ -0,0 +1,277 @@
+import heapq
+from typing import List, Optional, Tuple, Union
+from maze import Maze, MazeLocation, Cell
+
+
+BLOCKED: int = ord(Cell.BLOCKED.value)
+_OPEN_TABLE: bytes = bytes(0 if i == BLOCKED else 1 for i in range(256))
+
+
+class GridSearch:
+    # The grid is stored with a one cell blocked border so neighbour lookups
+    # never need bounds checks. Cells are plain ints: (row + 1) * width + column + 1.
+
+    def __init__(self, maze: Maze) -> None:
+        self._rows: int = maze.rows
+        self._columns: int = maze.columns
+        self._width: int = maze.columns + 2
+        self.start: MazeLocation = maze.start
+        self.goal: MazeLocation = maze.goal
+
+        cells: Union[bytearray, memoryview] = maze.to_bytes()
+        self._open: bytearray = bytearray(self._width * (self._rows + 2))
+        for row in range(self._rows):
+            first: int = (row + 1) * self._width + 1
+            line: bytes = bytes(cells[row * self._columns:(row + 1) * self._columns])
+            self._open[first:first + self._columns] = line.translate(_OPEN_TABLE)
+        self._offsets: Tuple[int, int, int, int] = (self._width, -self._width, -1, 1)
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    def index(self, ml: MazeLocation) -> int:
+        return (ml.row + 1) * self._width + ml.column + 1
+
+    def location(self, index: int) -> MazeLocation:
+        row, column = divmod(index, self._width)
+        return MazeLocation(row - 1, column - 1)
+
+    def _walkable(self, ml: MazeLocation) -> bool:
+        return 0 <= ml.row < self._rows and 0 <= ml.column < self._columns and self._open[self.index(ml)] == 1
+
+    def _came_from_to_path(self, came_from: bytearray, start: int, goal: int) -> List[MazeLocation]:
+        offsets: Tuple[int, int, int, int] = self._offsets
+        path: List[MazeLocation] = [self.location(goal)]
+        current: int = goal
+        while current != start:
+            current -= offsets[came_from[current] - 1]
+            path.append(self.location(current))
+        path.reverse()
+        return path
+
+    def set_blocked(self, ml: MazeLocation, blocked: bool) -> None:
+        self._open[self.index(ml)] = 0 if blocked else 1
+
+    def _bfs(self, source: int, target: int) -> bytearray:
+        walkable: bytearray = self._open
+        down, up, left, right = self._offsets
+        # came_from holds the direction (1-4) used to reach a cell, 0 means unvisited
+        came_from: bytearray = bytearray(len(walkable))
+        came_from[source] = 5
+        frontier: List[int] = [source]
+
+        while frontier:
+            next_frontier: List[int] = []
+            push = next_frontier.append
+            for current in frontier:
+                n = current + down
+                if walkable[n] and not came_from[n]:
+                    came_from[n] = 1
+                    push(n)
+                n = current + up
+                if walkable[n] and not came_from[n]:
+                    came_from[n] = 2
+                    push(n)
+                n = current + left
+                if walkable[n] and not came_from[n]:
+                    came_from[n] = 3
+                    push(n)
+                n = current + right
+                if walkable[n] and not came_from[n]:
+                    came_from[n] = 4
+                    push(n)
+            if target >= 0 and came_from[target]:
+                break
+            frontier = next_frontier
+
+        return came_from
+
+    def bfs(self, start: Optional[MazeLocation] = None,
+            goal: Optional[MazeLocation] = None) -> Optional[List[MazeLocation]]:
+        start = start if start is not None else self.start
+        goal = goal if goal is not None else self.goal
+        if not self._walkable(start) or not self._walkable(goal):
+            return None
+
+        source: int = self.index(start)
+        target: int = self.index(goal)
+        came_from: bytearray = self._bfs(source, target)
+        if not came_from[target]:
+            return None
+        return self._came_from_to_path(came_from, source, target)
+
+    def bfs_tree(self, start: MazeLocation) -> Optional[bytearray]:
+        # full single-source tree, one byte per cell, for answering many goals
+        if not self._walkable(start):
+            return None
+        return self._bfs(self.index(start), -1)
+
+    def tree_path(self, tree: bytearray, start: MazeLocation, goal: MazeLocation) -> Optional[List[MazeLocation]]:
+        if not self._walkable(goal):
+            return None
+        target: int = self.index(goal)
+        if not tree[target]:
+            return None
+        return self._came_from_to_path(tree, self.index(start), target)
+
+    def astar(self, start: Optional[MazeLocation] = None,
+              goal: Optional[MazeLocation] = None) -> Optional[List[MazeLocation]]:
+        start = start if start is not None else self.start
+        goal = goal if goal is not None else self.goal
+        if not self._walkable(start) or not self._walkable(goal):
+            return None
+
+        width: int = self._width
+        source: int = self.index(start)
+        target: int = self.index(goal)
+        goal_row, goal_column = divmod(target, width)
+        walkable: bytearray = self._open
+        offsets: Tuple[int, int, int, int] = self._offsets
+
+        came_from: bytearray = bytearray(len(walkable))
+        closed: bytearray = bytearray(len(walkable))
+        best_cost: dict = {source: 0}
+        came_from[source] = 5
+        # entries are (f, -g, cell) so ties go to the deeper node
+        frontier: List[Tuple[int, int, int]] = [(0, 0, source)]
+
+        while frontier:
+            _, negative_cost, current = heapq.heappop(frontier)
+            if closed[current]:
+                continue
+            if current == target:
+                return self._came_from_to_path(came_from, source, target)
+            closed[current] = 1
+            new_cost: int = 1 - negative_cost
+            for direction in range(4):
+                n = current + offsets[direction]
+                if not walkable[n] or closed[n]:
+                    continue
+                if new_cost < best_cost.get(n, new_cost + 1):
+                    best_cost[n] = new_cost
+                    came_from[n] = direction + 1
+                    row, column = divmod(n, width)
+                    heuristic: int = abs(goal_row - row) + abs(goal_column - column)
+                    heapq.heappush(frontier, (new_cost + heuristic, -new_cost, n))
+
+        return None
+
+    def _jump_horizontal(self, current: int, step: int, target: int) -> Optional[int]:
+        walkable: bytearray = self._open
+        width: int = self._width
+        while True:
+            current += step
+            if not walkable[current]:
+                return None
+            if current == target:
+                return current
+            behind: int = current - step
+            if (walkable[current - width] and not walkable[behind - width]) or \
+                    (walkable[current + width] and not walkable[behind + width]):
+                return current
+
+    def _jump_vertical(self, current: int, step: int, target: int) -> Optional[int]:
+        walkable: bytearray = self._open
+        while True:
+            current += step
+            if not walkable[current]:
+                return None
+            if current == target:
+                return current
+            behind: int = current - step
+            if (walkable[current - 1] and not walkable[behind - 1]) or \
+                    (walkable[current + 1] and not walkable[behind + 1]):
+                return current
+            if self._jump_horizontal(current, 1, target) is not None or \
+                    self._jump_horizontal(current, -1, target) is not None:
+                return current
+
+    def _pruned_directions(self, current: int, parent: int) -> List[int]:
+        width: int = self._width
+        if parent < 0:
+            return [width, -width, -1, 1]
+        delta: int = current - parent
+        if -width < delta < width:  # moved horizontally
+            return [width, -width, 1 if delta > 0 else -1]
+        return [-1, 1, width if delta > 0 else -width]
+
+    def jps(self, start: Optional[MazeLocation] = None,
+            goal: Optional[MazeLocation] = None) -> Optional[List[MazeLocation]]:
+        # Jump Point Search for a 4-connected, uniform cost grid: A* only pushes
+        # jump points, straight runs in between are skipped without touching the heap.
+        start = start if start is not None else self.start
+        goal = goal if goal is not None else self.goal
+        if not self._walkable(start) or not self._walkable(goal):
+            return None
+
+        width: int = self._width
+        source: int = self.index(start)
+        target: int = self.index(goal)
+        goal_row, goal_column = divmod(target, width)
+
+        parents: dict = {source: -1}
+        best_cost: dict = {source: 0}
+        closed: set = set()
+        frontier: List[Tuple[int, int, int]] = [(0, 0, source)]
+
+        while frontier:
+            _, negative_cost, current = heapq.heappop(frontier)
+            if current in closed:
+                continue
+            if current == target:
+                return self._jump_points_to_path(parents, target)
+            closed.add(current)
+            cost: int = -negative_cost
+            for direction in self._pruned_directions(current, parents[current]):
+                if -width < direction < width:
+                    jump_point = self._jump_horizontal(current, direction, target)
+                else:
+                    jump_point = self._jump_vertical(current, direction, target)
+                if jump_point is None or jump_point in closed:
+                    continue
+                row, column = divmod(jump_point, width)
+                current_row, current_column = divmod(current, width)
+                new_cost: int = cost + abs(row - current_row) + abs(column - current_column)
+                if new_cost < best_cost.get(jump_point, new_cost + 1):
+                    best_cost[jump_point] = new_cost
+                    parents[jump_point] = current
+                    heuristic: int = abs(goal_row - row) + abs(goal_column - column)
+                    heapq.heappush(frontier, (new_cost + heuristic, -new_cost, jump_point))
+
+        return None
+
+    def _jump_points_to_path(self, parents: dict, target: int) -> List[MazeLocation]:
+        width: int = self._width
+        path: List[MazeLocation] = [self.location(target)]
+        current: int = target
+        while parents[current] >= 0:
+            parent: int = parents[current]
+            step: int = width if abs(current - parent) >= width else 1
+            step = step if current > parent else -step
+            while current != parent:
+                current -= step
+                path.append(self.location(current))
+        path.reverse()
+        return path
+
+
+if __name__ == "__main__":
+    from time import perf_counter
+
+    m: Maze = Maze(400, 400, 0.1, goal=MazeLocation(399, 399))
+    grid: GridSearch = GridSearch(m)
+    for name, search in (("BFS", grid.bfs), ("A*", grid.astar), ("JPS", grid.jps)):
+        started: float = perf_counter()
+        path: Optional[List[MazeLocation]] = search()
+        elapsed: float = perf_counter() - started
+        if path is None:
+            print(f"{name}: no solution found in {elapsed:.3f}s")
+        else:
+            print(f"{name}: path of {len(path)} cells in {elapsed:.3f}s")
+
+    small: Maze = Maze()
+    solution: Optional[List[MazeLocation]] = GridSearch(small).jps()
+    if solution is not None:
+        small.mark(solution)
+    print(small)
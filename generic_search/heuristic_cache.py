@@ -0,0 +1,114 @@
+from __future__ import annotations
+import pickle
+from collections import deque
+from functools import lru_cache
+from math import inf
+from typing import TypeVar, Generic, Callable, Dict, Iterable, Optional, Deque, Hashable
+
+
+T = TypeVar('T')
+A = TypeVar('A', bound=Hashable)
+
+
+def memoize_heuristic(heuristic: Callable[[T], float], maxsize: Optional[int] = 1 << 20) -> Callable[[T], float]:
+    # states must be hashable, which they already are for the explored sets
+    return lru_cache(maxsize=maxsize)(heuristic)
+
+
+def max_heuristic(*heuristics: Callable[[T], float]) -> Callable[[T], float]:
+    # the max of admissible heuristics is still admissible and at least as strong
+    def heuristic(state: T) -> float:
+        return max(h(state) for h in heuristics)
+
+    return heuristic
+
+
+class PatternDatabase(Generic[T, A]):
+    # Exact goal distances in an abstraction of the state space, found by one
+    # backward BFS from the abstract goals. If every concrete move maps to an
+    # abstract move (or to no move at all), the table is an admissible heuristic.
+
+    def __init__(self, abstraction: Callable[[T], A], table: Optional[Dict[A, int]] = None,
+                 complete: bool = True) -> None:
+        self.abstraction: Callable[[T], A] = abstraction
+        self.table: Dict[A, int] = table if table is not None else {}
+        # False when build() stopped at max_entries before the BFS finished
+        self.complete: bool = complete
+        self._horizon: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def build(self, abstract_goals: Iterable[A], predecessors: Callable[[A], Iterable[A]],
+              max_entries: Optional[int] = None) -> None:
+        table: Dict[A, int] = {}
+        frontier: Deque[A] = deque()
+        for goal in abstract_goals:
+            if goal not in table:
+                table[goal] = 0
+                frontier.append(goal)
+
+        while frontier:
+            current: A = frontier.popleft()
+            distance: int = table[current] + 1
+            for predecessor in predecessors(current):
+                if predecessor in table:
+                    continue
+                table[predecessor] = distance
+                frontier.append(predecessor)
+            if max_entries is not None and len(table) >= max_entries:
+                break  # partial tables stay admissible, see heuristic()
+
+        self.table = table
+        self.complete = not frontier
+        self._horizon = None
+
+    def heuristic(self, state: T) -> float:
+        distance: Optional[int] = self.table.get(self.abstraction(state))
+        if distance is not None:
+            return distance
+        # a complete table has every state that can reach a goal; with a
+        # truncated one, missing states are no closer than the deepest layer reached
+        if self.complete:
+            return inf
+        if self._horizon is None:
+            self._horizon = max(self.table.values(), default=0)
+        return self._horizon
+
+    def __call__(self, state: T) -> float:
+        return self.heuristic(state)
+
+    def save(self, path: str) -> None:
+        # the abstraction is code, only the table goes to disk
+        with open(path, 'wb') as file:
+            pickle.dump((self.complete, self.table), file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str, abstraction: Callable[[T], A]) -> PatternDatabase[T, A]:
+        with open(path, 'rb') as file:
+            complete, table = pickle.load(file)
+        return cls(abstraction, table, complete)
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from generic_search import astar, SearchStats
+    from maze import Maze, MazeLocation, manhattan_distance
+
+    m: Maze = Maze(60, 60, 0.25, goal=MazeLocation(59, 59))
+
+    # identity abstraction: the database holds exact distances to the goal
+    database: PatternDatabase[MazeLocation, MazeLocation] = PatternDatabase(lambda ml: ml)
+    database.build([m.goal], m.successors)
+    path: str = os.path.join(tempfile.gettempdir(), "maze_pdb.pickle")
+    database.save(path)
+    loaded: PatternDatabase[MazeLocation, MazeLocation] = PatternDatabase.load(path, lambda ml: ml)
+
+    for name, heuristic in (("manhattan", memoize_heuristic(manhattan_distance(m.goal))),
+                            ("pattern database", loaded)):
+        stats: SearchStats = SearchStats()
+        solution = astar(m.start, m.goal_test, m.successors, heuristic, stats)
+        print(f"{name}: {'no solution' if solution is None else solution.cost}, "
+              f"{stats.expanded} expansions")
+    os.remove(path)
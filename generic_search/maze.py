@@ -1,8 +1,16 @@
+from __future__ import annotations
+import mmap
 import random
+import struct
 from enum import Enum
-from typing import List, NamedTuple, Callable, Optional
+from typing import List, NamedTuple, Callable, Optional, Tuple, Union, Iterator, Dict
 from math import sqrt
-from generic_search import dfs, bfs, astar, node_to_path, Node
+from generic_search import dfs, bfs, bidirectional_bfs, astar, weighted_astar, node_to_path, Node, SearchStats
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, without it random fills run cell by cell
+    np = None
 
 
 class Cell(str, Enum):
@@ -18,6 +26,105 @@ class MazeLocation(NamedTuple):
     column: int
 
 
+CELL_BY_BYTE: Dict[int, Cell] = {ord(cell.value): cell for cell in Cell}
+
+# binary maze file: magic, rows, columns, start row/column, goal row/column,
+# then rows * columns cell characters in row-major order
+MAZE_MAGIC: bytes = b'MAZ1'
+MAZE_HEADER: struct.Struct = struct.Struct('<4sIIIIII')
+
+# numpy random fills are generated in slices of this many cells to bound memory
+FILL_CHUNK: int = 1 << 22
+
+
+def random_cells(rows: int, columns: int, sparseness: float, seed: Optional[int] = None) -> bytearray:
+    cells: bytearray = bytearray(Cell.EMPTY.value * (rows * columns), 'ascii')
+    if np is None:
+        uniform: Callable[[float, float], float] = random.Random(seed).uniform if seed is not None else random.uniform
+        blocked: int = ord(Cell.BLOCKED.value)
+        for i in range(rows * columns):
+            if uniform(0, 1.0) < sparseness:
+                cells[i] = blocked
+        return cells
+
+    # without an explicit seed draw one from random, so random.seed() still reproduces mazes
+    generator = np.random.default_rng(seed if seed is not None else random.getrandbits(64))
+    view = np.frombuffer(cells, dtype=np.uint8)
+    for first in range(0, len(cells), FILL_CHUNK):
+        chunk = view[first:first + FILL_CHUNK]
+        chunk[generator.random(len(chunk), dtype=np.float32) < sparseness] = ord(Cell.BLOCKED.value)
+    return cells
+
+
+class ByteRow:
+    def __init__(self, grid: ByteGrid, offset: int, columns: int) -> None:
+        self._grid: ByteGrid = grid
+        self._buffer: Union[bytearray, mmap.mmap] = grid.buffer
+        self._offset: int = offset
+        self._columns: int = columns
+
+    def __len__(self) -> int:
+        return self._columns
+
+    def __getitem__(self, column: int) -> Cell:
+        return CELL_BY_BYTE[self._buffer[self._offset + column]]
+
+    def __setitem__(self, column: int, cell: Cell) -> None:
+        self._buffer[self._offset + column] = ord(cell.value)
+        self._grid.modified = True
+
+    def __iter__(self) -> Iterator[Cell]:
+        for byte in self._buffer[self._offset:self._offset + self._columns]:
+            yield CELL_BY_BYTE[byte]
+
+
+class ByteGrid:
+    # Drop-in replacement for the List[List[Cell]] grid that keeps one byte per
+    # cell in a bytearray or an mmap of a maze file. Mapped grids pickle as their
+    # file path, so worker processes map the same pages instead of copying them,
+    # unless the grid was edited in a private copy of the file: that pickles as
+    # bytes, since the file no longer matches what this process sees.
+
+    def __init__(self, buffer: Union[bytearray, mmap.mmap], rows: int, columns: int,
+                 offset: int = 0, path: Optional[str] = None, access: int = mmap.ACCESS_COPY) -> None:
+        self.buffer: Union[bytearray, mmap.mmap] = buffer
+        self._rows: int = rows
+        self._columns: int = columns
+        self._offset: int = offset
+        self._path: Optional[str] = path
+        self._access: int = access
+        self.modified: bool = False
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, row: int) -> ByteRow:
+        if not 0 <= row < self._rows:
+            raise IndexError('Row out of range')
+        return ByteRow(self, self._offset + row * self._columns, self._columns)
+
+    def __iter__(self) -> Iterator[ByteRow]:
+        for row in range(self._rows):
+            yield self[row]
+
+    def cells(self) -> memoryview:
+        return memoryview(self.buffer)[self._offset:self._offset + self._rows * self._columns]
+
+    def __reduce__(self):
+        if self._path is not None and (self._access == mmap.ACCESS_WRITE or not self.modified):
+            return _map_grid, (self._path, self._access)
+        return ByteGrid, (bytearray(self.cells()), self._rows, self._columns)
+
+
+def _map_grid(path: str, access: int = mmap.ACCESS_COPY) -> ByteGrid:
+    with open(path, 'r+b' if access == mmap.ACCESS_WRITE else 'rb') as file:
+        buffer: mmap.mmap = mmap.mmap(file.fileno(), 0, access=access)
+    magic, rows, columns, *_ = MAZE_HEADER.unpack_from(buffer)
+    if magic != MAZE_MAGIC:
+        raise ValueError(f'{path} is not a maze file')
+    return ByteGrid(buffer, rows, columns, MAZE_HEADER.size, path, access)
+
+
 class Maze:
 
     def __init__(
@@ -27,18 +134,70 @@ class Maze:
             sparseness: float = 0.2,
             start: MazeLocation = MazeLocation(0, 0),
             goal: MazeLocation = MazeLocation(9, 9),
+            seed: Optional[int] = None,
     ):
         self._rows: int = rows
         self._columns: int = columns
         self.start: MazeLocation = start
         self.goal: MazeLocation = goal
 
-        self._grid: List[List[Cell]] = [[Cell.EMPTY for _ in range(columns)] for _ in range(rows)]
-        self._randomly_fill(rows, columns, sparseness)
+        self._grid: Union[List[List[Cell]], ByteGrid] = [[Cell.EMPTY for _ in range(columns)] for _ in range(rows)]
+        self._randomly_fill(rows, columns, sparseness, seed)
         self._grid[start.row][start.column] = Cell.START
         self._grid[goal.row][goal.column] = Cell.GOAL
+        self._listeners: List[Callable[[List[MazeLocation]], None]] = []
+
+    @classmethod
+    def _from_grid(cls, grid: ByteGrid, rows: int, columns: int,
+                   start: MazeLocation, goal: MazeLocation) -> Maze:
+        maze: Maze = cls.__new__(cls)
+        maze._rows = rows
+        maze._columns = columns
+        maze.start = start
+        maze.goal = goal
+        maze._grid = grid
+        maze._listeners = []
+        return maze
+
+    @classmethod
+    def generate(
+            cls,
+            rows: int,
+            columns: int,
+            sparseness: float = 0.2,
+            start: MazeLocation = MazeLocation(0, 0),
+            goal: Optional[MazeLocation] = None,
+            seed: Optional[int] = None,
+    ) -> Maze:
+        # byte-per-cell maze for sizes where a list of lists of Cells does not fit
+        goal = goal if goal is not None else MazeLocation(rows - 1, columns - 1)
+        grid: ByteGrid = ByteGrid(random_cells(rows, columns, sparseness, seed), rows, columns)
+        grid[start.row][start.column] = Cell.START
+        grid[goal.row][goal.column] = Cell.GOAL
+        return cls._from_grid(grid, rows, columns, start, goal)
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as file:
+            file.write(MAZE_HEADER.pack(MAZE_MAGIC, self._rows, self._columns,
+                                        self.start.row, self.start.column, self.goal.row, self.goal.column))
+            file.write(self.to_bytes())
+
+    @classmethod
+    def open(cls, path: str, writable: bool = False) -> Maze:
+        # Maps the file instead of reading it. By default writes (mark, clear)
+        # stay private to this process; writable=True writes through to the file.
+        grid: ByteGrid = _map_grid(path, mmap.ACCESS_WRITE if writable else mmap.ACCESS_COPY)
+        _, rows, columns, start_row, start_column, goal_row, goal_column = MAZE_HEADER.unpack_from(grid.buffer)
+        return cls._from_grid(grid, rows, columns,
+                              MazeLocation(start_row, start_column), MazeLocation(goal_row, goal_column))
+
+    def _randomly_fill(self, rows: int, columns: int, sparseness: float, seed: Optional[int] = None) -> None:
+        if np is not None or seed is not None:
+            cells: bytearray = random_cells(rows, columns, sparseness, seed)
+            self._grid = [[CELL_BY_BYTE[byte] for byte in cells[row * columns:(row + 1) * columns]]
+                          for row in range(rows)]
+            return
 
-    def _randomly_fill(self, rows: int, columns: int, sparseness: float) -> None:
         for row in range(rows):
             for column in range(columns):
                 self._random_cell_fill(row, column, sparseness)
@@ -47,6 +206,23 @@ class Maze:
         if random.uniform(0, 1.0) < sparseness:
             self._grid[row][column] = Cell.BLOCKED
 
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    @property
+    def columns(self) -> int:
+        return self._columns
+
+    def cell(self, ml: MazeLocation) -> Cell:
+        return self._grid[ml.row][ml.column]
+
+    def to_bytes(self) -> Union[bytearray, memoryview]:
+        # byte-backed grids hand out their buffer as is, treat it as read-only
+        if isinstance(self._grid, ByteGrid):
+            return self._grid.cells()
+        return bytearray(''.join([c.value for row in self._grid for c in row]), 'ascii')
+
     def __str__(self) -> str:
         output: str = ''
         for row in self._grid:
@@ -73,17 +249,48 @@ class Maze:
 
         return locations
 
+    def weighted_successors(self, ml: MazeLocation) -> List[Tuple[MazeLocation, float]]:
+        return [(location, 1.0) for location in self.successors(ml)]
+
+    def __getstate__(self) -> dict:
+        # listeners belong to this process, a copy sent to a worker starts without any
+        state: dict = self.__dict__.copy()
+        state['_listeners'] = []
+        return state
+
+    def subscribe(self, listener: Callable[[List[MazeLocation]], None]) -> None:
+        # listeners are told which cells became blocked or unblocked
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[List[MazeLocation]], None]) -> None:
+        self._listeners.remove(listener)
+
+    def _notify(self, changed: List[MazeLocation]) -> None:
+        if changed:
+            for listener in self._listeners:
+                listener(changed)
+
+    def set_cell(self, ml: MazeLocation, cell: Cell) -> None:
+        was_blocked: bool = self._grid[ml.row][ml.column] == Cell.BLOCKED
+        self._grid[ml.row][ml.column] = cell
+        if was_blocked != (cell == Cell.BLOCKED):
+            self._notify([ml])
+
     def mark(self, path: List[MazeLocation]):
+        changed: List[MazeLocation] = [ml for ml in path if self._grid[ml.row][ml.column] == Cell.BLOCKED]
         for maze_location in path:
             self._grid[maze_location.row][maze_location.column] = Cell.PATH
         self._grid[self.start.row][self.start.column] = Cell.START
         self._grid[self.goal.row][self.goal.column] = Cell.GOAL
+        self._notify(changed)
 
     def clear(self, path: List[MazeLocation]) -> None:
+        changed: List[MazeLocation] = [ml for ml in path if self._grid[ml.row][ml.column] == Cell.BLOCKED]
         for maze_location in path:
             self._grid[maze_location.row][maze_location.column] = Cell.EMPTY
         self._grid[self.start.row][self.start.column] = Cell.START
         self._grid[self.goal.row][self.goal.column] = Cell.GOAL
+        self._notify(changed)
 
 
 def euclidean_distance(goal: MazeLocation) -> Callable[[MazeLocation], float]:
@@ -131,13 +338,37 @@ if __name__ == "__main__":
         print(m)
         m.clear(path2)
 
+    # Test bidirectional BFS, moves in a maze are reversible
+    solution_bi: Optional[Node[MazeLocation]] = bidirectional_bfs(m.start, m.goal,
+                                                                 m.successors, m.successors)
+    if solution_bi is None:
+        print("No solution found using bidirectional breadth-first search!")
+    else:
+        path_bi: List[MazeLocation] = node_to_path(solution_bi)
+        m.mark(path_bi)
+        print(m)
+        m.clear(path_bi)
+
     # Test A*
     distance: Callable[[MazeLocation], float] = manhattan_distance(m.goal)
+    astar_stats: SearchStats = SearchStats()
     solution3: Optional[Node[MazeLocation]] = astar(m.start, m.goal_test,
-                                                    m.successors, distance)
+                                                    m.successors, distance, astar_stats)
+    print(astar_stats)
     if solution3 is None:
         print("No solution found using A*!")
     else:
         path3: List[MazeLocation] = node_to_path(solution3)
         m.mark(path3)
         print(m)
+        m.clear(path3)
+
+    # Test A* with step costs
+    solution4: Optional[Node[MazeLocation]] = weighted_astar(m.start, m.goal_test,
+                                                             m.weighted_successors, distance)
+    if solution4 is None:
+        print("No solution found using weighted A*!")
+    else:
+        path4: List[MazeLocation] = node_to_path(solution4)
+        m.mark(path4)
+        print(m)
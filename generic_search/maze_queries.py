@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from typing import List, Optional, Set
+from maze import Maze, MazeLocation, Cell
+from grid_search import GridSearch
+
+
+# rough per-entry cost of the OrderedDict slot and bytearray header
+TREE_OVERHEAD: int = 200
+
+
+class MazeQueries:
+    # Answers many start/goal queries on one maze. Each source gets a full BFS
+    # tree (one byte per cell) which is kept in an LRU cache bounded by bytes,
+    # so repeated sources only walk the stored tree back from the goal.
+
+    def __init__(self, maze: Maze, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self._maze: Maze = maze
+        self._grid: GridSearch = GridSearch(maze)
+        self._max_bytes: int = max_bytes
+        self._used_bytes: int = 0
+        self._trees: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        maze.subscribe(self._on_cells_changed)
+
+    def close(self) -> None:
+        self._maze.unsubscribe(self._on_cells_changed)
+        self._trees.clear()
+        self._used_bytes = 0
+
+    @property
+    def cached_sources(self) -> List[MazeLocation]:
+        return list(self._trees.keys())
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used_bytes
+
+    def _tree(self, source: MazeLocation) -> Optional[bytearray]:
+        tree: Optional[bytearray] = self._trees.get(source)
+        if tree is not None:
+            self._trees.move_to_end(source)
+            self.hits += 1
+            return tree
+
+        self.misses += 1
+        tree = self._grid.bfs_tree(source)
+        if tree is None:
+            return None
+        size: int = len(tree) + TREE_OVERHEAD
+        if size > self._max_bytes:
+            return tree  # too big to keep, answer this query only
+        while self._trees and self._used_bytes + size > self._max_bytes:
+            _, evicted = self._trees.popitem(last=False)
+            self._used_bytes -= len(evicted) + TREE_OVERHEAD
+        self._trees[source] = tree
+        self._used_bytes += size
+        return tree
+
+    def path(self, start: MazeLocation, goal: MazeLocation) -> Optional[List[MazeLocation]]:
+        tree: Optional[bytearray] = self._tree(start)
+        if tree is None:
+            return None
+        return self._grid.tree_path(tree, start, goal)
+
+    def distance(self, start: MazeLocation, goal: MazeLocation) -> Optional[int]:
+        path: Optional[List[MazeLocation]] = self.path(start, goal)
+        return None if path is None else len(path) - 1
+
+    def _on_cells_changed(self, changed: List[MazeLocation]) -> None:
+        grid: GridSearch = self._grid
+        affected: Set[int] = set()
+        for ml in changed:
+            blocked: bool = self._maze.cell(ml) == Cell.BLOCKED
+            grid.set_blocked(ml, blocked)
+            index: int = grid.index(ml)
+            if blocked:
+                # only trees that reached the cell used it
+                affected.add(index)
+            else:
+                # a newly open cell matters to trees that reached a neighbour
+                affected.update((index - 1, index + 1, index - grid.width, index + grid.width))
+
+        stale: List[MazeLocation] = [source for source, tree in self._trees.items()
+                                     if any(tree[index] for index in affected)]
+        for source in stale:
+            tree: bytearray = self._trees.pop(source)
+            self._used_bytes -= len(tree) + TREE_OVERHEAD
+
+
+if __name__ == "__main__":
+    from random import randrange
+    from time import perf_counter
+
+    m: Maze = Maze(200, 200, 0.2, goal=MazeLocation(199, 199))
+    queries: MazeQueries = MazeQueries(m)
+    goals: List[MazeLocation] = [MazeLocation(randrange(200), randrange(200)) for _ in range(1000)]
+
+    started: float = perf_counter()
+    for goal in goals:
+        queries.path(m.start, goal)
+    elapsed: float = perf_counter() - started
+    print(f"1000 queries from one source in {elapsed * 1000:.1f}ms "
+          f"({queries.misses} tree built, {queries.hits} cache hits)")
+
+    m.set_cell(MazeLocation(0, 1), Cell.BLOCKED)
+    print(f"Cached sources after a change next to the start: {queries.cached_sources}")
@@ -7,15 +7,23 @@ MAX_NUM: int = 3
 
 class MCState:
 
-    def __init__(self, missionaries: int, cannibals: int, boat: bool) -> None:
+    def __init__(self, missionaries: int, cannibals: int, boat: bool, total: int = MAX_NUM) -> None:
         self.wm: int = missionaries
         self.wc: int = cannibals
 
-        self.em: int = MAX_NUM - missionaries
-        self.ec : int = MAX_NUM - cannibals
+        self.em: int = total - missionaries
+        self.ec : int = total - cannibals
 
         self.boat: bool = boat # if true then on west bank
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MCState):
+            return NotImplemented
+        return (self.wm, self.wc, self.em, self.ec, self.boat) == (other.wm, other.wc, other.em, other.ec, other.boat)
+
+    def __hash__(self) -> int:
+        return hash((self.wm, self.wc, self.em, self.ec, self.boat))
+
     def __str__(self) -> str:
         return ("On the west bank there are {} missionaries and {} cannibals.\n"
                 "On the east bank there are {} missionaries and {} cannibals.\n"
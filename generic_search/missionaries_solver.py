@@ -0,0 +1,115 @@
+from array import array
+from typing import List, Optional, Tuple
+from missionaries import MCState, display_solution
+
+
+class MissionariesSolver:
+    # Missionaries and cannibals for any number of people and boat capacity.
+    # A state (west missionaries, west cannibals, boat on west) is packed into
+    # one int, and successors come from a transition table built once over the
+    # legal states only, so BFS never creates or filters state objects.
+
+    def __init__(self, people: int, capacity: int = 2) -> None:
+        self.people: int = people
+        self.capacity: int = capacity
+        # boatloads (missionaries, cannibals) that keep missionaries safe in the boat too
+        self.moves: List[Tuple[int, int]] = [
+            (m, c) for m in range(capacity + 1) for c in range(capacity + 1 - m)
+            if 0 < m + c and (m == 0 or m >= c)
+        ]
+
+        # successors of state s are _targets[_starts[s]:_ends[s]], empty for illegal states
+        self.state_count: int = 2 * (people + 1) ** 2
+        self._starts: array = array('l', [0]) * self.state_count
+        self._ends: array = array('l', [0]) * self.state_count
+        self._targets: array = array('l')
+        for state in self._legal_states():
+            self._starts[state] = len(self._targets)
+            self._targets.extend(self._successors(state))
+            self._ends[state] = len(self._targets)
+
+    def encode(self, missionaries: int, cannibals: int, boat: bool) -> int:
+        return (missionaries * (self.people + 1) + cannibals) * 2 + int(boat)
+
+    def decode(self, state: int) -> Tuple[int, int, bool]:
+        rest, boat = divmod(state, 2)
+        missionaries, cannibals = divmod(rest, self.people + 1)
+        return missionaries, cannibals, bool(boat)
+
+    def _legal_states(self) -> List[int]:
+        # a bank is safe when it has no missionaries or at least as many as
+        # cannibals, so both are safe only if wm is 0, all, or equal to wc
+        states: List[int] = []
+        for wm in range(self.people + 1):
+            cannibals = range(self.people + 1) if wm in (0, self.people) else (wm,)
+            for wc in cannibals:
+                states.append(self.encode(wm, wc, False))
+                states.append(self.encode(wm, wc, True))
+        return states
+
+    def _is_legal(self, state: int) -> bool:
+        wm, wc, _ = self.decode(state)
+        em, ec = self.people - wm, self.people - wc
+        return not (0 < wm < wc) and not (0 < em < ec)
+
+    def _successors(self, state: int) -> List[int]:
+        wm, wc, boat = self.decode(state)
+        direction: int = -1 if boat else 1  # people leave the bank the boat is on
+        result: List[int] = []
+        for m, c in self.moves:
+            new_wm, new_wc = wm + direction * m, wc + direction * c
+            if 0 <= new_wm <= self.people and 0 <= new_wc <= self.people:
+                successor: int = self.encode(new_wm, new_wc, not boat)
+                if self._is_legal(successor):
+                    result.append(successor)
+        return result
+
+    def solve(self) -> Optional[List[MCState]]:
+        start: int = self.encode(self.people, self.people, True)
+        goal: int = self.encode(0, 0, False)
+        starts, ends, targets = self._starts, self._ends, self._targets
+        parents: array = array('l', [-1]) * self.state_count
+        parents[start] = start
+        frontier: List[int] = [start]
+
+        while frontier and parents[goal] < 0:
+            next_frontier: List[int] = []
+            for state in frontier:
+                for i in range(starts[state], ends[state]):
+                    successor: int = targets[i]
+                    if parents[successor] < 0:
+                        parents[successor] = state
+                        next_frontier.append(successor)
+            frontier = next_frontier
+
+        if parents[goal] < 0:
+            return None
+
+        path: List[MCState] = []
+        state = goal
+        while True:
+            wm, wc, boat = self.decode(state)
+            path.append(MCState(wm, wc, boat, self.people))
+            if state == start:
+                break
+            state = parents[state]
+        path.reverse()
+        return path
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+
+    classic: Optional[List[MCState]] = MissionariesSolver(3, 2).solve()
+    if classic is None:
+        print('Solution is not found')
+    else:
+        display_solution(classic)
+
+    started: float = perf_counter()
+    large: Optional[List[MCState]] = MissionariesSolver(500, 6).solve()
+    elapsed: float = perf_counter() - started
+    if large is None:
+        print('Solution is not found for 500 people')
+    else:
+        print(f'500 missionaries and cannibals, boat for 6: {len(large) - 1} crossings in {elapsed:.3f}s')
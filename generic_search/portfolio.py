@@ -0,0 +1,144 @@
+from __future__ import annotations
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from time import monotonic
+from typing import List, Optional, Tuple, NamedTuple, Callable, Dict, Set, Generator
+from generic_search import Node
+from anytime_search import iter_dfs, iter_bfs, iter_astar, EventKind, SearchEvent
+from maze import Maze, MazeLocation, manhattan_distance, euclidean_distance
+
+
+Strategy = Tuple[str, Optional[str]]
+
+DEFAULT_STRATEGIES: List[Strategy] = [
+    ("dfs", None),
+    ("bfs", None),
+    ("astar", "manhattan"),
+    ("astar", "euclidean"),
+]
+
+HEURISTICS: Dict[str, Callable[[MazeLocation], Callable[[MazeLocation], float]]] = {
+    "manhattan": manhattan_distance,
+    "euclidean": euclidean_distance,
+}
+
+# how many expansions a worker runs between looks at the stop flag
+CHECK_EVERY: int = 1024
+
+_stop_event = None
+
+
+class PortfolioResult(NamedTuple):
+    strategy: Strategy
+    node: Node[MazeLocation]
+    path_length: int
+    elapsed: float
+
+
+def _init_worker(stop_event) -> None:
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _run_strategy(maze: Maze, strategy: Strategy) -> Tuple[Strategy, Optional[List[MazeLocation]], float]:
+    # Heuristics are closures, which do not pickle, so workers get names and
+    # build them here. The search is one of the streaming variants so the
+    # worker can give up cooperatively once another strategy has won.
+    started: float = monotonic()
+    name, heuristic_name = strategy
+    events: Generator[SearchEvent[MazeLocation], None, None]
+    if name == "dfs":
+        events = iter_dfs(maze.start, maze.goal_test, maze.successors)
+    elif name == "bfs":
+        events = iter_bfs(maze.start, maze.goal_test, maze.successors)
+    elif name == "astar":
+        heuristic: Callable[[MazeLocation], float] = HEURISTICS[heuristic_name](maze.goal)
+        events = iter_astar(maze.start, maze.goal_test, maze.successors, heuristic)
+    else:
+        raise ValueError(f'Unknown search strategy {name}')
+
+    for event in events:
+        if event.kind == EventKind.SOLUTION:
+            return strategy, _node_to_list(event.node), monotonic() - started
+        if event.kind == EventKind.EXHAUSTED:
+            break
+        if event.expanded % CHECK_EVERY == 0 and _stop_event is not None and _stop_event.is_set():
+            break
+    return strategy, None, monotonic() - started
+
+
+def _node_to_list(node: Node[MazeLocation]) -> List[MazeLocation]:
+    # plain lists pickle without recursing once per node like a Node chain would
+    path: List[MazeLocation] = [node.state]
+    while node.parent is not None:
+        node = node.parent
+        path.append(node.state)
+    path.reverse()
+    return path
+
+
+def _list_to_node(path: List[MazeLocation]) -> Node[MazeLocation]:
+    node: Optional[Node[MazeLocation]] = None
+    for cost, state in enumerate(path):
+        node = Node(state, node, float(cost))
+    return node
+
+
+def run_portfolio(
+        maze: Maze,
+        strategies: Optional[List[Strategy]] = None,
+        deadline: Optional[float] = None,
+        best: bool = False,
+        max_workers: Optional[int] = None,
+) -> Optional[PortfolioResult]:
+    # Races the strategies in a process pool. By default the first solution
+    # wins; with best=True every strategy that finishes before the deadline
+    # (in seconds) is compared and the shortest path wins.
+    strategies = strategies if strategies is not None else DEFAULT_STRATEGIES
+    stop_event = multiprocessing.Event()
+    results: List[PortfolioResult] = []
+    end: Optional[float] = monotonic() + deadline if deadline is not None else None
+
+    executor: ProcessPoolExecutor = ProcessPoolExecutor(
+        max_workers=max_workers or min(len(strategies), multiprocessing.cpu_count()),
+        initializer=_init_worker,
+        initargs=(stop_event,),
+    )
+    try:
+        pending: Set[Future] = {executor.submit(_run_strategy, maze, strategy) for strategy in strategies}
+        while pending:
+            timeout: Optional[float] = max(0.0, end - monotonic()) if end is not None else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break  # deadline passed
+            for future in done:
+                strategy, path, elapsed = future.result()
+                if path is not None:
+                    results.append(PortfolioResult(strategy, _list_to_node(path), len(path), elapsed))
+            if results and not best:
+                break
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if not results:
+        return None
+    return min(results, key=lambda result: (result.path_length, result.elapsed))
+
+
+if __name__ == "__main__":
+    from generic_search import node_to_path
+
+    m: Maze = Maze(300, 300, 0.2, goal=MazeLocation(299, 299))
+    first: Optional[PortfolioResult] = run_portfolio(m)
+    if first is None:
+        print("No strategy found a solution!")
+    else:
+        print(f"First solution: {first.strategy} with {first.path_length} cells in {first.elapsed:.3f}s")
+        shortest: Optional[PortfolioResult] = run_portfolio(m, deadline=5.0, best=True)
+        print(f"Shortest within 5s: {shortest.strategy} with {shortest.path_length} cells")
+        small: Maze = Maze()
+        result: Optional[PortfolioResult] = run_portfolio(small)
+        if result is not None:
+            small.mark(node_to_path(result.node))
+            print(small)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import heapq
+from array import array
+from collections import deque
+from itertools import count
+from typing import TypeVar, Generic, List, Dict, Optional, Callable, Tuple, Deque
+from generic_search import Node
+
+
+T = TypeVar('T')
+
+
+class SearchArena(Generic[T]):
+    # One row per distinct state: the state is interned to an int id and the
+    # parent id, path cost and f-value live in flat typed arrays, so a
+    # generated state costs a few machine words instead of a Node object.
+
+    def __init__(self) -> None:
+        self._ids: Dict[T, int] = {}
+        self.states: List[T] = []
+        self.parents: array = array('q')
+        self.costs: array = array('d')
+        self.f_values: array = array('d')
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __contains__(self, state: T) -> bool:
+        return state in self._ids
+
+    def id_of(self, state: T) -> Optional[int]:
+        return self._ids.get(state)
+
+    def add(self, state: T, parent: int, cost: float = 0.0, f_value: float = 0.0) -> int:
+        node_id: int = len(self.states)
+        self._ids[state] = node_id
+        self.states.append(state)
+        self.parents.append(parent)
+        self.costs.append(cost)
+        self.f_values.append(f_value)
+        return node_id
+
+    def update(self, node_id: int, parent: int, cost: float, f_value: float) -> None:
+        self.parents[node_id] = parent
+        self.costs[node_id] = cost
+        self.f_values[node_id] = f_value
+
+    def node(self, node_id: int) -> Node[T]:
+        # only the chain back to the root is materialised, for node_to_path
+        ids: List[int] = []
+        while node_id >= 0:
+            ids.append(node_id)
+            node_id = self.parents[node_id]
+
+        node: Optional[Node[T]] = None
+        for i in reversed(ids):
+            node = Node(self.states[i], node, self.costs[i], self.f_values[i] - self.costs[i])
+        return node
+
+
+def arena_dfs(initial: T, goal_test: Callable[[T], bool],
+              successors: Callable[[T], List[T]]) -> Optional[Node[T]]:
+    arena: SearchArena[T] = SearchArena()
+    frontier: List[int] = [arena.add(initial, -1)]
+
+    while frontier:
+        current: int = frontier.pop()
+        current_state: T = arena.states[current]
+
+        if goal_test(current_state):
+            return arena.node(current)
+
+        for child in successors(current_state):
+            if child in arena:
+                continue
+            frontier.append(arena.add(child, current))
+
+    return None
+
+
+def arena_bfs(initial: T, goal_test: Callable[[T], bool],
+              successors: Callable[[T], List[T]]) -> Optional[Node[T]]:
+    arena: SearchArena[T] = SearchArena()
+    frontier: Deque[int] = deque([arena.add(initial, -1)])
+
+    while frontier:
+        current: int = frontier.popleft()
+        current_state: T = arena.states[current]
+
+        if goal_test(current_state):
+            return arena.node(current)
+
+        cost: float = arena.costs[current] + 1
+        for child in successors(current_state):
+            if child in arena:
+                continue
+            frontier.append(arena.add(child, current, cost, cost))
+
+    return None
+
+
+def arena_astar(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], List[T]],
+        heuristic: Callable[[T], float]
+) -> Optional[Node[T]]:
+    arena: SearchArena[T] = SearchArena()
+    tiebreak = count()
+    start: int = arena.add(initial, -1, 0.0, heuristic(initial))
+    # heap entries are plain (f, tiebreak, id) tuples, compared without calling Python code
+    frontier: List[Tuple[float, int, int]] = [(arena.f_values[start], next(tiebreak), start)]
+
+    while frontier:
+        f_value, _, current = heapq.heappop(frontier)
+        if f_value > arena.f_values[current]:
+            continue  # stale entry, a cheaper path was pushed later
+        current_state: T = arena.states[current]
+
+        if goal_test(current_state):
+            return arena.node(current)
+
+        new_cost: float = arena.costs[current] + 1
+        for child in successors(current_state):
+            child_id: Optional[int] = arena.id_of(child)
+            if child_id is None:
+                child_id = arena.add(child, current, new_cost, new_cost + heuristic(child))
+            elif new_cost < arena.costs[child_id]:
+                h: float = arena.f_values[child_id] - arena.costs[child_id]
+                arena.update(child_id, current, new_cost, new_cost + h)
+            else:
+                continue
+            heapq.heappush(frontier, (arena.f_values[child_id], next(tiebreak), child_id))
+
+    return None
+
+
+if __name__ == "__main__":
+    from generic_search import node_to_path
+    from maze import Maze, MazeLocation, manhattan_distance
+
+    m: Maze = Maze()
+    for name, solution in (
+            ("depth-first search", arena_dfs(m.start, m.goal_test, m.successors)),
+            ("breadth-first search", arena_bfs(m.start, m.goal_test, m.successors)),
+            ("A*", arena_astar(m.start, m.goal_test, m.successors, manhattan_distance(m.goal))),
+    ):
+        if solution is None:
+            print(f"No solution found using {name}!")
+        else:
+            path: List[MazeLocation] = node_to_path(solution)
+            m.mark(path)
+            print(m)
+            m.clear(path)